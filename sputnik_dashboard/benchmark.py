@@ -0,0 +1,371 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import warnings
+import platform
+import resource
+import subprocess
+import multiprocessing
+from datetime import date, datetime, timedelta, timezone
+from collections import Counter
+
+import numpy as np
+
+# Benchmarks sur corpus synthétiques au format Sputnik (metadata + data[année][mois][jour][articles])
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.bench')
+BENCH_SIZES = (10_000, 100_000, 1_000_000)
+BENCH_CORPORA = ('a', 'b')
+BENCH_START, BENCH_END = date(2024, 1, 1), date(2025, 10, 12)
+
+# Vocabulaire : loi de Heaps (V = k * n^beta) calée sur le corpus réel, fréquences de Zipf d'exposant ZIPF_S
+HEAPS_BETA = 0.6
+HEAPS_K = {'kws': 132, 'loc': 14, 'org': 10, 'per': 18}
+ZIPF_S = 1.1
+# Forme moyenne d'un article réel : paragraphes, phrases par paragraphe, mots-clés et entités par phrase
+PARAGRAPHS = 5
+SENTENCES = 1.3
+TOKENS_PER_SENTENCE = {'kws': 9, 'loc': 0.9, 'org': 0.3, 'per': 0.5}
+SYLLABLES = ['ba', 'ri', 'on', 'que', 'té', 'ber', 'lo', 'fra', 'mi', 'sa', 'nu', 'dé', 'gou', 'ver', 'ne', 'man',
+             'pré', 'si', 'dent', 'ru', 'kra', 'ine', 'af', 'ca', 'tion', 'mo', 'li', 'tar', 'é', 'co', 'pol', 'tique']
+
+PERIODS = ('all', '2024', '2025', 'last6')
+TOP_N = (10, 50)
+FREQUENCIES = ('D', 'W', 'M')
+DEPTHS = (1, 3)
+
+
+# Génération
+def make_vocabulary(ent, size, rng):
+    # Pseudo-mots uniques : minuscules pour les mots-clés, noms propres pour les entités
+    words, seen = [], set()
+    while len(words) < size:
+        word = ''.join(rng.choice(SYLLABLES, size=rng.integers(2, 5)))
+        if ent == 'per':
+            word = f"{word.capitalize()} {''.join(rng.choice(SYLLABLES, size=2)).capitalize()}"
+        elif ent != 'kws':
+            word = word.capitalize()
+        if word in seen:
+            word = f"{word}{len(words)}"
+        seen.add(word)
+        words.append(word)
+    return words
+
+
+class ZipfSampler:
+    def __init__(self, words, rng):
+        self.words = words
+        weights = 1.0 / np.arange(1, len(words) + 1) ** ZIPF_S
+        self.cdf = np.cumsum(weights) / weights.sum()
+        self.rng = rng
+
+    def sample(self, n):
+        return [self.words[i] for i in np.searchsorted(self.cdf, self.rng.random(n))]
+
+
+def make_article(day, serial, samplers, rng):
+    ent_lists = {ent: [] for ent in TOKENS_PER_SENTENCE}
+    segmented = []
+    for _ in range(1 + rng.poisson(PARAGRAPHS - 1)):
+        sentences = []
+        for ent in ent_lists:
+            ent_lists[ent].append([])
+        for _ in range(1 + rng.poisson(SENTENCES - 1)):
+            tokens = {ent: samplers[ent].sample(max(int(rng.poisson(mean)), 1 if ent == 'kws' else 0))
+                      for ent, mean in TOKENS_PER_SENTENCE.items()}
+            for ent, terms in tokens.items():
+                ent_lists[ent][-1].append(terms)
+            words = tokens['kws'] + tokens['per'] + tokens['loc'] + tokens['org']
+            sentences.append(' '.join(words).capitalize() + '.')
+        segmented.append(sentences)
+    timestamp = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()) + int(rng.integers(0, 86400))
+    article = {
+        'url': f"https://fr.sputniknews.africa/{day.strftime('%Y%m%d')}/{10 ** 9 + serial}.html",
+        'title': segmented[0][0],
+        'timestamp': timestamp,
+        'date': day.isoformat(),
+        'content': '\n\n'.join(' '.join(p) for p in segmented),
+        'content-segmented': [[[s] for s in p] for p in segmented],
+    }
+    for ent, paragraphs in ent_lists.items():
+        article[f'{ent}-l'] = paragraphs
+    for ent, paragraphs in ent_lists.items():
+        article[ent] = dict(Counter(t for p in paragraphs for s in p for t in s))
+    return article
+
+
+def _aggregate(target, article):
+    for ent in TOKENS_PER_SENTENCE:
+        target.setdefault(ent, Counter()).update(article[ent])
+    target['num'] = target.get('num', 0) + 1
+
+
+def generate_corpus(path, n_articles, seed=0, vocab_seed=0):
+    # Écrit d'abord data dans un fichier temporaire (un jour à la fois), puis metadata + data dans le fichier final
+    rng = np.random.default_rng(seed)
+    vocab_rng = np.random.default_rng(vocab_seed)
+    samplers = {ent: ZipfSampler(make_vocabulary(ent, max(int(k * n_articles ** HEAPS_BETA), 10), vocab_rng), rng)
+                for ent, k in HEAPS_K.items()}
+    days = [BENCH_START + timedelta(days=i) for i in range((BENCH_END - BENCH_START).days + 1)]
+    per_day = np.bincount(rng.integers(0, len(days), n_articles), minlength=len(days))
+    meta = {'all': {}, 'year': {}, 'month': {}, 'day': {}}
+    tmp = path + '.data.tmp'
+    serial = 0
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write('{')
+        current = (None, None)
+        for day, count in zip(days, per_day):
+            if not count:
+                continue
+            y, m, d = str(day.year), str(day.month), str(day.day)
+            if current[0] != y:
+                f.write(('}}, ' if current[0] else '') + f'"{y}": {{"{m}": {{')
+            elif current[1] != m:
+                f.write(f'}}, "{m}": {{')
+            else:
+                f.write(', ')
+            current = (y, m)
+            f.write(f'"{d}": [')
+            for k in range(count):
+                article = make_article(day, serial, samplers, rng)
+                serial += 1
+                f.write((', ' if k else '') + json.dumps(article, ensure_ascii=False))
+                for target in (meta['all'], meta['year'].setdefault(y, {}), meta['month'].setdefault(y, {}).setdefault(m, {}),
+                               meta['day'].setdefault(y, {}).setdefault(m, {}).setdefault(d, {})):
+                    _aggregate(target, article)
+            f.write(']')
+        f.write('}}}' if current[0] else '}')
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write('{"metadata": ')
+        json.dump(meta, out, ensure_ascii=False)
+        out.write(', "data": ')
+        with open(tmp, 'r', encoding='utf-8') as f:
+            shutil.copyfileobj(f, out)
+        out.write('}')
+    os.remove(tmp)
+    return path
+
+
+def corpus_dir(size, bench_dir=BENCH_DIR):
+    return os.path.join(bench_dir, f'n{size}')
+
+
+def ensure_corpora(size, bench_dir=BENCH_DIR):
+    # Deux corpus de size / 2 articles (vocabulaire commun, tirages différents) pour exercer la vue combinée
+    data_dir = os.path.join(corpus_dir(size, bench_dir), 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    paths = []
+    for k, name in enumerate(BENCH_CORPORA):
+        path = os.path.join(data_dir, f'fr.sputniknews.africa-bench-{name}.json')
+        if not os.path.exists(path):
+            t0 = time.perf_counter()
+            generate_corpus(path, size // len(BENCH_CORPORA), seed=k + 1)
+            print(f"Corpus {path} généré en {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+        paths.append(path)
+    return paths
+
+
+# Mesures (chaque phase dans un processus neuf : mémoire et imports isolés)
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def _use_bench_dirs(size, bench_dir):
+    os.environ['SPUTNIK_DATA_DIR'] = os.path.join(corpus_dir(size, bench_dir), 'data')
+    os.environ['SPUTNIK_STORE_DIR'] = os.path.join(corpus_dir(size, bench_dir), 'store')
+    os.environ['SPUTNIK_CACHE_BACKEND'] = 'memory'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_ingest(size, bench_dir, workers):
+    # Ingestion complète (stores supprimés) : temps et pic mémoire
+    _use_bench_dirs(size, bench_dir)
+    import corpus_store
+    shutil.rmtree(corpus_store.STORE_DIR, ignore_errors=True)
+    records = []
+    for json_path in sorted(os.listdir(corpus_store.DATA_DIR)):
+        t0 = time.perf_counter()
+        corpus_store.ingest(os.path.join(corpus_store.DATA_DIR, json_path), workers=workers)
+        records.append({'phase': 'startup', 'name': 'ingest', 'params': {'corpus': json_path, 'workers': workers},
+                        'seconds': time.perf_counter() - t0, 'peak_rss_mb': _peak_rss_mb()})
+    return records
+
+
+def _timed(func, args, repeat, clear):
+    times, value = [], None
+    for _ in range(repeat):
+        if clear is not None:
+            clear()
+        t0 = time.perf_counter()
+        value = func(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times), value
+
+
+def _payload_bytes(value):
+    from plotly.io.json import to_json_plotly
+    try:
+        return len(to_json_plotly(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def bench_app(size, bench_dir, repeat):
+    # Démarrage de l'application (stores déjà ingérés), puis chaque callback par combinaison de filtres
+    _use_bench_dirs(size, bench_dir)
+    # Avertissements de dépréciation de plotly express / pandas : sans effet sur les mesures
+    warnings.simplefilter('ignore', FutureWarning)
+    records = []
+    t0 = time.perf_counter()
+    import dashboard_app as dash_app
+    import wsgi
+    from cache import cache
+    records.append({'phase': 'startup', 'name': 'import_app', 'params': {}, 'seconds': time.perf_counter() - t0,
+                    'rss_mb': _rss_mb()})
+    t0 = time.perf_counter()
+    wsgi.preload(dash_app.registry)
+    records.append({'phase': 'startup', 'name': 'preload', 'params': {}, 'seconds': time.perf_counter() - t0,
+                    'rss_mb': _rss_mb()})
+
+    def record(name, func, args, params):
+        cold, value = _timed(func, args, repeat, cache.clear)
+        warm, _ = _timed(func, args, repeat, None)
+        records.append({'phase': 'callback', 'name': name, 'params': params, 'seconds': cold, 'warm_seconds': warm,
+                        'bytes': _payload_bytes(value)})
+        return cold
+
+    for corpus in [dash_app.registry.names()[0], 'Combined']:
+        top_words = dash_app.get_top_entities(corpus, 'kws', 2)['entity'].tolist()
+        top_person = dash_app.get_top_entities(corpus, 'per', 1)['entity'].tolist()
+        for period in PERIODS:
+            start_date, end_date, _, _ = dash_app.update_date_range(period, corpus)
+            base = {'corpus': 'single' if corpus != 'Combined' else 'combined', 'period': period}
+            dates = (corpus, start_date, end_date)
+            total = record('update_date_range', dash_app.update_date_range, (period, corpus), base)
+            total += record('calculate_kpis', dash_app.calculate_kpis,
+                            (corpus, dash_app.parse_date(start_date), dash_app.parse_date(end_date)), base)
+            total += record('update_kpis', dash_app.update_kpis, dates, base)
+            for top_n in TOP_N:
+                params = dict(base, top_n=top_n)
+                total += record('update_word_selector', dash_app.update_word_selector, dates + (top_n,), params)
+                total += record('update_top_keywords', dash_app.update_top_keywords, dates + (top_n,), params)
+                total += record('update_actors_locations', dash_app.update_actors_locations, dates + (top_n,), params)
+            total += record('update_geography', dash_app.update_geography, dates, base)
+            for freq in FREQUENCIES:
+                params = dict(base, freq=freq)
+                record('get_temporal_data', dash_app.get_temporal_data,
+                       (corpus, dash_app.parse_date(start_date), dash_app.parse_date(end_date), freq), params)
+                total += record('update_temporal', dash_app.update_temporal, dates + (freq,), params)
+            total += record('update_attention_peaks', dash_app.update_attention_peaks, dates, base)
+            total += record('update_correlation', dash_app.update_correlation, dates, base)
+            for depth in DEPTHS:
+                total += record('update_word_network', dash_app.update_word_network, dates + (top_words[0], depth),
+                                dict(base, depth=depth))
+            for label, clauses in [('one_term', [['kws', top_words[0]]]), ('two_terms', [['kws', w] for w in top_words]),
+                                   ('entity', [['per', p] for p in top_person])]:
+                query = {'label': label, 'clauses': clauses, 'start': None, 'end': None}
+                total += record('update_search_results', dash_app.update_search_results, (query,) + dates,
+                                dict(base, query=label))
+            # Équivalent de l'ancien update_all_visualizations : une interaction complète, caches froids
+            records.append({'phase': 'callback', 'name': 'all_visualizations', 'params': base, 'seconds': total})
+    records.append({'phase': 'memory', 'name': 'app', 'params': {}, 'rss_mb': _rss_mb(), 'peak_rss_mb': _peak_rss_mb()})
+    return records
+
+
+def _in_fresh_process(func, *args):
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(func, args)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, bench_dir=BENCH_DIR, repeat=3, workers=1):
+    import numpy
+    results = {'commit': git_commit(), 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+               'python': platform.python_version(), 'numpy': numpy.__version__, 'platform': platform.platform(),
+               'cpu_count': os.cpu_count(), 'repeat': repeat, 'records': []}
+    for size in sizes:
+        ensure_corpora(size, bench_dir)
+        for record in _in_fresh_process(bench_ingest, size, bench_dir, workers) + _in_fresh_process(bench_app, size, bench_dir, repeat):
+            results['records'].append(dict(record, size=size))
+        print(f"n={size} : {len(results['records'])} mesures", file=sys.stderr)
+    return results
+
+
+# Comparaison entre deux exécutions (par exemple deux commits)
+def record_key(record):
+    return record['size'], record['phase'], record['name'], json.dumps(record.get('params', {}), sort_keys=True)
+
+
+def compare(base, new, threshold=1.25, min_seconds=0.005):
+    # Ratios nouveau / référence des temps ; régression si ratio > threshold sur une mesure d'au moins min_seconds
+    base_records = {record_key(r): r for r in base['records'] if 'seconds' in r}
+    rows, regressions = [], []
+    for record in new['records']:
+        old = base_records.get(record_key(record))
+        if old is None or 'seconds' not in record:
+            continue
+        ratio = record['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        rows.append((record_key(record), old['seconds'], record['seconds'], ratio))
+        if ratio > threshold and max(old['seconds'], record['seconds']) >= min_seconds:
+            regressions.append(rows[-1])
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du dashboard sur corpus synthétiques")
+    sub = parser.add_subparsers(dest='command', required=True)
+    gen = sub.add_parser('generate', help="Générer les corpus synthétiques")
+    gen.add_argument('--sizes', type=int, nargs='+', default=list(BENCH_SIZES))
+    gen.add_argument('--dir', default=BENCH_DIR)
+    bench = sub.add_parser('run', help="Mesurer ingestion, démarrage, mémoire et callbacks")
+    bench.add_argument('--sizes', type=int, nargs='+', default=list(BENCH_SIZES))
+    bench.add_argument('--dir', default=BENCH_DIR)
+    bench.add_argument('--repeat', type=int, default=3)
+    bench.add_argument('--workers', type=int, default=1, help="Processus d'ingestion")
+    bench.add_argument('--output', help="Fichier JSON de résultats (défaut : <dir>/results-<commit>.json)")
+    cmp_parser = sub.add_parser('compare', help="Comparer deux fichiers de résultats")
+    cmp_parser.add_argument('base')
+    cmp_parser.add_argument('new')
+    cmp_parser.add_argument('--threshold', type=float, default=1.25)
+    cmp_parser.add_argument('--min-seconds', type=float, default=0.005)
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        for size in args.sizes:
+            ensure_corpora(size, args.dir)
+    elif args.command == 'run':
+        results = run(args.sizes, args.dir, args.repeat, args.workers)
+        output = args.output or os.path.join(args.dir, f"results-{results['commit'] or 'local'}.json")
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+        print(output)
+    else:
+        with open(args.base, encoding='utf-8') as f:
+            base = json.load(f)
+        with open(args.new, encoding='utf-8') as f:
+            new = json.load(f)
+        rows, regressions = compare(base, new, args.threshold, args.min_seconds)
+        for key, old, cur, ratio in rows:
+            flag = ' <-- régression' if (key, old, cur, ratio) in regressions else ''
+            print(f"{key[0]:>8} {key[2]:<26} {key[3]:<60} {old * 1000:9.2f} ms {cur * 1000:9.2f} ms x{ratio:5.2f}{flag}")
+        print(f"{len(regressions)} régression(s) sur {len(rows)} mesures (seuil x{args.threshold})")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+from scipy import sparse
+
+from columns import extend_csr
+from timeseries import ordinals_to_datetime64
+
+# Pics d'attention : part mensuelle d'un terme (mentions par article) comparée à sa moyenne des BURST_WINDOW mois précédents
+BURST_ENTITIES = ('kws', 'per', 'loc')
+BURST_WINDOW = 6
+# Mois de référence publiés nécessaires avant de pouvoir signaler un pic
+BURST_MIN_BASELINE = 2
+BURST_MIN_COUNT = 5
+BURST_MIN_Z = 3.0
+# Pics conservés par mois et type d'entité
+BURST_TOP = 20
+# Termes traités par bloc (matrice dense mois x termes bornée en mémoire)
+BURST_BLOCK = 8192
+
+
+def month_numbers(ordinals):
+    # Jours (ordinaux) -> mois absolus (mois depuis janvier 1970)
+    return ordinals_to_datetime64(ordinals).astype('datetime64[M]').astype(np.int64)
+
+
+def month_of(day):
+    # Date -> mois absolu
+    return (day.year - 1970) * 12 + day.month - 1
+
+
+def month_start(month):
+    # Mois absolu -> premier jour du mois
+    return date(1970 + month // 12, month % 12 + 1, 1)
+
+
+def burst_days(start=None, end=None):
+    # Jours dont dépendent les scores des mois couvrant [début, fin] : mois entiers et BURST_WINDOW mois de référence
+    first = None if start is None else month_start(month_of(start) - BURST_WINDOW)
+    last = None if end is None else month_start(month_of(end) + 1) - timedelta(days=1)
+    return first, last
+
+
+def month_label(month):
+    return str(np.datetime64(int(month), 'M'))
+
+
+def month_calendar(days, day_num):
+    # Mois absolus contigus du premier au dernier jour publié, mois de chaque jour (indice) et articles par mois
+    day_month = month_numbers(days)
+    if not len(day_month):
+        return np.zeros(0, np.int64), day_month, np.zeros(0, np.int64)
+    months = np.arange(day_month[0], day_month[-1] + 1)
+    row = day_month - months[0]
+    return months, row, np.bincount(row, weights=day_num, minlength=len(months)).astype(np.int64)
+
+
+def month_sums(month_row, n_months, indptr, indices, data, n_terms):
+    # CSR jours x termes sommée par mois (month_row : mois de chaque jour, indice dans le calendrier)
+    by_day = sparse.csr_matrix((np.asarray(data), np.asarray(indices), np.asarray(indptr)), shape=(len(month_row), n_terms))
+    group = sparse.csr_matrix((np.ones(len(month_row)), (month_row, np.arange(len(month_row)))),
+                              shape=(n_months, len(month_row)))
+    return group @ by_day
+
+
+def monthly_counts(days, day_num, indptr, indices, data, n_terms):
+    # CSR jours x termes -> (mois, articles par mois, CSR mois x termes)
+    months, row, month_num = month_calendar(days, day_num)
+    matrix = month_sums(row, len(months), indptr, indices, data, n_terms).astype(np.int64).tocsr()
+    matrix.sort_indices()
+    return months, month_num, matrix
+
+
+def burst_scores(counts, month_num, window=BURST_WINDOW):
+    # Score z de chaque cellule mois x terme : (part - moyenne) / écart-type sur les mois précédents (fenêtre glissante
+    # calculée par sommes cumulées) ; la variance est complétée par le bruit de Poisson attendu pour la part moyenne,
+    # si bien qu'un terme absent de la référence a pour score son nombre de mentions
+    counts = np.asarray(counts, dtype=np.float64)
+    n = np.asarray(month_num, dtype=np.float64)
+    active = n > 0
+    share = np.divide(counts, n[:, None], out=np.zeros_like(counts), where=active[:, None])
+    zero = np.zeros((1, counts.shape[1]))
+    c0 = np.concatenate(([0], np.cumsum(active)))
+    c1 = np.concatenate((zero, np.cumsum(share, axis=0)))
+    c2 = np.concatenate((zero, np.cumsum(share ** 2, axis=0)))
+    months = np.arange(len(n))
+    lo = np.maximum(months - window, 0)
+    k = (c0[months] - c0[lo]).astype(np.float64)[:, None]
+    mean = (c1[months] - c1[lo]) / np.maximum(k, 1)
+    var = np.maximum((c2[months] - c2[lo]) / np.maximum(k, 1) - mean ** 2, 0)
+    n_safe = np.maximum(n, 1)[:, None]
+    z = (share - mean) / np.sqrt(var + np.maximum(mean, 1 / n_safe) / n_safe)
+    z[(k[:, 0] < BURST_MIN_BASELINE) | ~active] = 0
+    return z
+
+
+def detect_bursts(months, month_num, matrix, top=BURST_TOP):
+    # Tout le vocabulaire, par blocs de termes : (mois absolu, terme, score z, mentions) des top pics de chaque mois
+    empty = (np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float64), np.zeros(0, np.int64))
+    if not matrix.nnz:
+        return empty
+    by_term = matrix.tocsc()
+    candidates = np.flatnonzero(by_term.max(axis=0).toarray().ravel() >= BURST_MIN_COUNT)
+    parts = []
+    for b in range(0, len(candidates), BURST_BLOCK):
+        block = candidates[b:b + BURST_BLOCK]
+        counts = by_term[:, block].toarray()
+        z = burst_scores(counts, month_num)
+        z[counts < BURST_MIN_COUNT] = -np.inf
+        # Top du bloc pour chaque mois, ex aequo compris (classement final indépendant du découpage en blocs)
+        k = min(top, len(block))
+        kth = -np.partition(-z, k - 1, axis=1)[:, k - 1]
+        rows, cols = np.nonzero(z >= np.maximum(kth, BURST_MIN_Z)[:, None])
+        parts.append((rows, block[cols], z[rows, cols], counts[rows, cols]))
+    if not parts:
+        return empty
+    rows, terms, scores, counts = (np.concatenate(p) for p in zip(*parts))
+    # Classement final par mois (score décroissant, terme croissant), top pics de chaque mois
+    order = np.lexsort((terms, -scores, rows))
+    rows, terms, scores, counts = rows[order], terms[order], scores[order], counts[order]
+    starts = np.searchsorted(rows, rows, 'left')
+    keep = np.arange(len(rows)) - starts < top
+    return months[rows[keep]], terms[keep].astype(np.int64), scores[keep], counts[keep].astype(np.int64)
+
+
+def save_months(path, days, day_num):
+    # Calendrier mensuel commun aux types d'entité
+    months, _, month_num = month_calendar(days, day_num)
+    np.save(os.path.join(path, 'months.npy'), months)
+    np.save(os.path.join(path, 'month_num.npy'), month_num)
+
+
+def build_bursts(path, ent, months, month_num, matrix):
+    # Matrice mensuelle (conservée pour les scores d'une sélection de termes) et pics pré-calculés à l'ingestion ;
+    # sommes par mois (flottants) ramenées à des entiers
+    matrix = matrix.astype(np.int64).tocsr()
+    matrix.sort_indices()
+    np.save(os.path.join(path, f'{ent}_month_indptr.npy'), matrix.indptr)
+    np.save(os.path.join(path, f'{ent}_month_indices.npy'), matrix.indices)
+    np.save(os.path.join(path, f'{ent}_month_data.npy'), matrix.data)
+    _save_bursts(path, ent, *detect_bursts(months, month_num, matrix))
+
+
+def extend_bursts(old_path, path, ent, bursts, days, day_num, day_csr, n_terms, first):
+    # Jours ajoutés en fin de calendrier à partir du jour first : lignes mensuelles antérieures au mois de ce jour
+    # reprises telles quelles, pics détectés à nouveau pour les seuls mois suivants (BURST_WINDOW mois de référence relus)
+    months, row, month_num = month_calendar(days, day_num)
+    m0 = int(row[first])
+    d0 = int(np.searchsorted(row, m0, 'left'))
+    indptr, indices, data = day_csr
+    lo, hi = int(indptr[d0]), int(indptr[-1])
+    _, _, tail = monthly_counts(days[d0:], day_num[d0:], np.asarray(indptr[d0:]) - lo, indices[lo:hi], data[lo:hi], n_terms)
+    # Mois sans article entre le dernier mois stocké et celui du jour first : lignes vides
+    keep = min(m0, len(bursts.months))
+    tail_ptr = np.concatenate((np.zeros(m0 - keep, dtype=tail.indptr.dtype), tail.indptr))
+    extend_csr(old_path, path, f'{ent}_month', keep, (tail_ptr, tail.indices, tail.data))
+    matrix = _load_matrix(path, ent, len(months), n_terms)
+    start = max(m0 - BURST_WINDOW, 0)
+    month, term, z, count = detect_bursts(months[start:], month_num[start:], matrix[start:])
+    new, old = month >= months[m0], np.asarray(bursts.month) < months[m0]
+    _save_bursts(path, ent, *(np.concatenate((np.asarray(a)[old], b[new]))
+                              for a, b in zip((bursts.month, bursts.term, bursts.z, bursts.count), (month, term, z, count))))
+
+
+def _save_bursts(path, ent, month, term, z, count):
+    np.save(os.path.join(path, f'{ent}_burst_month.npy'), month)
+    np.save(os.path.join(path, f'{ent}_burst_term.npy'), term.astype(np.int32))
+    np.save(os.path.join(path, f'{ent}_burst_z.npy'), z.astype(np.float32))
+    np.save(os.path.join(path, f'{ent}_burst_count.npy'), count.astype(np.int32))
+
+
+def _load_matrix(path, ent, n_months, n_terms):
+    # Matrice mensuelle mois x termes en mmap
+    def load(name):
+        return np.load(os.path.join(path, f'{ent}_month_{name}.npy'), mmap_mode='r')
+    return sparse.csr_matrix((load('data'), load('indices'), load('indptr')), shape=(n_months, n_terms), copy=False)
+
+
+class Bursts:
+    # Pics d'un type d'entité et matrice mensuelle associée (ids locaux d'un store ou ids globaux d'une combinaison)
+    def __init__(self, months, month_num, matrix, month, term, z, count):
+        self.months, self.month_num, self.matrix = months, month_num, matrix
+        self.month, self.term, self.z, self.count = month, term, z, count
+
+    @classmethod
+    def load(cls, path, ent, n_terms):
+        def load(name):
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+        months = load('months')
+        return cls(months, load('month_num'), _load_matrix(path, ent, len(months), n_terms), load(f'{ent}_burst_month'),
+                   load(f'{ent}_burst_term'), load(f'{ent}_burst_z'), load(f'{ent}_burst_count'))
+
+    @classmethod
+    def combine(cls, parts, n_terms):
+        # parts : [(Bursts d'un store, ids locaux -> globaux)] ; comptes sommés sur un calendrier commun, puis détection
+        parts = [(b, remap) for b, remap in parts if len(b.months)]
+        if not parts:
+            months, matrix = np.zeros(0, np.int64), sparse.csr_matrix((0, n_terms), dtype=np.int64)
+            return cls(months, months, matrix, *detect_bursts(months, months, matrix))
+        first = min(int(b.months[0]) for b, _ in parts)
+        months = np.arange(first, max(int(b.months[-1]) for b, _ in parts) + 1)
+        month_num = np.zeros(len(months), dtype=np.int64)
+        matrix = sparse.csr_matrix((len(months), n_terms), dtype=np.int64)
+        for b, remap in parts:
+            offset = int(b.months[0]) - first
+            month_num[offset:offset + len(b.months)] += b.month_num
+            coo = b.matrix.tocoo()
+            matrix = matrix + sparse.csr_matrix((coo.data, (coo.row + offset, remap[coo.col])), shape=matrix.shape)
+        return cls(months, month_num, matrix, *detect_bursts(months, month_num, matrix))
+
+    def top_terms(self, start_month, end_month, n):
+        # Termes aux pics les plus forts sur [start_month, end_month] : [(terme, score max, mois du pic)]
+        keep = (np.asarray(self.month) >= start_month) & (np.asarray(self.month) <= end_month)
+        best = {}
+        for month, term, z in zip(np.asarray(self.month)[keep], np.asarray(self.term)[keep], np.asarray(self.z)[keep]):
+            if int(term) not in best or z > best[int(term)][0]:
+                best[int(term)] = (float(z), int(month))
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:n]
+        return [(term, z, month) for term, (z, month) in ranked]
+
+    def scores(self, terms, start_month, end_month):
+        # (mois, mentions, scores z) des termes demandés sur les mois de l'intervalle (référence prise avant le début)
+        lo = int(np.searchsorted(self.months, start_month, 'left'))
+        hi = int(np.searchsorted(self.months, end_month, 'right'))
+        counts = self.matrix[:hi][:, terms].toarray()
+        z = burst_scores(counts, self.month_num[:hi])
+        return np.asarray(self.months[lo:hi]), counts[lo:], z[lo:]
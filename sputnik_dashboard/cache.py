@@ -0,0 +1,153 @@
+import os
+import time
+import pickle
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+
+import orjson
+from plotly.io.json import to_json_plotly
+
+from metrics import METRICS_ENABLED, count_cache, observe_payload, span
+
+# Configuration : 'memory' (par processus) ou 'file' (partagé entre workers d'une même machine)
+CACHE_BACKEND = os.environ.get('SPUTNIK_CACHE_BACKEND', 'memory')
+CACHE_DIR = os.environ.get('SPUTNIK_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+CACHE_TTL = float(os.environ.get('SPUTNIK_CACHE_TTL', '3600'))
+CACHE_MAX_ENTRIES = int(os.environ.get('SPUTNIK_CACHE_MAX_ENTRIES', '2048'))
+
+
+class MemoryCache:
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries, self.ttl = max_entries, ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache:
+    def __init__(self, directory=CACHE_DIR, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.directory, self.max_entries, self.ttl = directory, max_entries, ttl
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # Utilisation récente = mtime, pour l'éviction LRU
+        os.utime(path)
+        return (None, value) if stored_key == key else None
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._writes += 1
+        if self._writes % 64 == 0:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+def make_cache(backend=CACHE_BACKEND):
+    return FileCache() if backend == 'file' else MemoryCache()
+
+
+cache = make_cache()
+
+
+class Serialized(bytes):
+    # JSON d'une figure déjà sérialisé (orjson) : compact en mémoire, rapide à copier entre workers
+    pass
+
+
+def _dump(value):
+    if hasattr(value, 'to_plotly_json'):
+        return Serialized(to_json_plotly(value, engine='orjson').encode('utf-8'))
+    return value
+
+
+def _load(value):
+    # Figure rendue en dict : pas de revalidation Plotly, re-sérialisée par Dash via orjson
+    return orjson.loads(memoryview(value)) if isinstance(value, Serialized) else value
+
+
+def cached(namespace, stamp=None):
+    # Mémoïsation d'un callback, clé = (namespace, arguments des filtres)
+    # stamp(*args) : version des données concernées ; une entrée d'une autre version est recalculée
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (namespace,) + args
+            version = stamp(*args) if stamp is not None else None
+            entry = cache.get(key)
+            if entry is not None and entry[1][0] == version:
+                if METRICS_ENABLED:
+                    count_cache(namespace, 'hit')
+                with span('serialize'):
+                    return _load(entry[1][1])
+            if METRICS_ENABLED:
+                count_cache(namespace, 'miss' if entry is None else 'stale')
+            result = func(*args)
+            with span('serialize'):
+                value = _dump(result)
+            if METRICS_ENABLED and isinstance(value, Serialized):
+                observe_payload('figure', namespace, len(value))
+            cache.set(key, (version, value))
+            with span('serialize'):
+                return _load(value)
+        return wrapper
+    return decorator
@@ -0,0 +1,217 @@
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+# Valeurs gardées en mémoire par colonne du builder avant d'être écrites sur disque
+SPILL_CHUNK = 1 << 18
+
+
+class ColumnWriter:
+    # Colonne .npy 1-D écrite par morceaux, sans les garder en mémoire : NumPy réserve dans l'en-tête la place
+    # d'une longueur qui grandit, l'en-tête est donc réécrit sur place à la fermeture
+    def __init__(self, path, dtype):
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self.f = open(path, 'wb')
+        self._write_header()
+        self.offset = self.f.tell()
+
+    @classmethod
+    def extend(cls, path, base, keep=None):
+        # Reprend les keep premières valeurs (toutes par défaut) de la colonne base : fichier copié puis tronqué,
+        # rien n'est relu en mémoire ; la suite est ajoutée par write()
+        column = np.load(base, mmap_mode='r')
+        self = cls.__new__(cls)
+        self.dtype, self.offset = column.dtype, column.offset
+        self.length = len(column) if keep is None else keep
+        del column
+        shutil.copyfile(base, path)
+        self.f = open(path, 'r+b')
+        self.f.truncate(self.offset + self.length * self.dtype.itemsize)
+        self.f.seek(0, os.SEEK_END)
+        return self
+
+    def _write_header(self):
+        self.f.seek(0)
+        np.lib.format.write_array_header_1_0(self.f, {'descr': np.lib.format.dtype_to_descr(self.dtype),
+                                                      'fortran_order': False, 'shape': (self.length,)})
+
+    def write(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self.f.write(values.tobytes())
+        self.length += len(values)
+
+    def close(self):
+        self._write_header()
+        if self.f.tell() != self.offset:
+            raise ValueError(f"en-tête .npy de taille modifiée : {self.f.name}")
+        self.f.close()
+
+
+def read_column(file_path, lo, hi):
+    # Valeurs [lo, hi) d'une colonne .npy lues dans le fichier (ni mmap ni colonne entière en mémoire)
+    with open(file_path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        _, _, dtype = read_header(f)
+        return np.fromfile(f, dtype=dtype, count=hi - lo, offset=lo * dtype.itemsize)
+
+
+def extend_column(old_path, path, name, keep, tail):
+    # Colonne name de old_path réduite à ses keep premières valeurs, suivies de tail, écrite dans path
+    writer = ColumnWriter.extend(os.path.join(path, f'{name}.npy'), os.path.join(old_path, f'{name}.npy'), keep)
+    writer.write(tail)
+    writer.close()
+
+
+def extend_csr(old_path, path, name, keep_rows, tail):
+    # CSR (indptr, indices, data) : keep_rows premières lignes reprises, lignes de tail (indptr, indices, data) ajoutées
+    indptr = np.load(os.path.join(old_path, f'{name}_indptr.npy'), mmap_mode='r')
+    keep = int(indptr[keep_rows])
+    extend_column(old_path, path, f'{name}_indptr', keep_rows + 1, keep + np.asarray(tail[0][1:], dtype=np.int64))
+    extend_column(old_path, path, f'{name}_indices', keep, tail[1])
+    extend_column(old_path, path, f'{name}_data', keep, tail[2])
+
+
+def link_file(old_path, path, name):
+    # Fichier inchangé d'une version à la suivante : lien physique (copie si le système de fichiers le refuse)
+    try:
+        os.link(os.path.join(old_path, name), os.path.join(path, name))
+    except OSError:
+        shutil.copyfile(os.path.join(old_path, name), os.path.join(path, name))
+
+
+class CSRWriter:
+    # CSR (indptr, indices, data) écrite par blocs de lignes consécutives (indptr de chaque bloc partant de 0)
+    def __init__(self, path, name, dtypes=(np.int64, np.int32, np.int32)):
+        self.columns = [ColumnWriter(os.path.join(path, f'{name}_{col}.npy'), dtype)
+                        for col, dtype in zip(('indptr', 'indices', 'data'), dtypes)]
+        self.columns[0].write([0])
+        self.nnz = 0
+
+    def write(self, indptr, indices, data):
+        self.columns[0].write(self.nnz + np.asarray(indptr[1:], dtype=np.int64))
+        self.columns[1].write(indices)
+        self.columns[2].write(data)
+        self.nnz += int(indptr[-1])
+
+    def close(self):
+        for column in self.columns:
+            column.close()
+
+
+class SpillColumn:
+    # Colonne d'entiers du builder : valeurs accumulées dans un array puis ajoutées par blocs de chunk valeurs à un
+    # fichier brut, la mémoire ne croît pas avec le nombre de mentions ; relue par positions (mmap refermé aussitôt)
+    def __init__(self, path, typecode='i', chunk=SPILL_CHUNK):
+        self.path, self.typecode, self.chunk = path, typecode, chunk
+        self.dtype = np.dtype(typecode)
+        self.buffer = array(typecode)
+        self.n_spilled = 0
+
+    def __len__(self):
+        return self.n_spilled + len(self.buffer)
+
+    def extend(self, values):
+        self.buffer.extend(values)
+        if len(self.buffer) >= self.chunk:
+            self.flush()
+
+    def frombytes(self, data):
+        self.buffer.frombytes(data)
+        if len(self.buffer) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        with open(self.path, 'ab') as f:
+            self.buffer.tofile(f)
+        self.n_spilled += len(self.buffer)
+        self.buffer = array(self.typecode)
+
+    def take(self, positions):
+        # Valeurs aux positions données, dans leur ordre
+        positions = np.asarray(positions, dtype=np.int64)
+        out = np.empty(len(positions), dtype=self.dtype)
+        spilled = positions < self.n_spilled
+        if spilled.any():
+            disk = np.memmap(self.path, dtype=self.dtype, mode='r', shape=(self.n_spilled,))
+            out[spilled] = disk[positions[spilled]]
+            del disk
+        rest = ~spilled
+        out[rest] = np.frombuffer(self.buffer, dtype=self.dtype)[positions[rest] - self.n_spilled]
+        return out
+
+    def read(self, lo=0, hi=None):
+        # Valeurs [lo, hi) lues à la suite
+        hi = len(self) if hi is None else min(hi, len(self))
+        parts = []
+        if lo < min(hi, self.n_spilled):
+            with open(self.path, 'rb') as f:
+                parts.append(np.fromfile(f, dtype=self.dtype, count=min(hi, self.n_spilled) - lo,
+                                         offset=lo * self.dtype.itemsize))
+        if hi > self.n_spilled:
+            parts.append(np.frombuffer(self.buffer, dtype=self.dtype)[max(lo - self.n_spilled, 0):hi - self.n_spilled])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype)
+
+    def copy_from(self, other, remap=None):
+        # Valeurs d'une autre colonne ajoutées à la suite par blocs, converties par remap (tableau) si donné
+        for lo in range(0, len(other), self.chunk):
+            values = other.read(lo, lo + self.chunk)
+            self.frombytes((values if remap is None else remap[values]).astype(self.dtype, copy=False).tobytes())
+
+
+def load_bounds(load, chunk):
+    # Bornes de tranches de clés consécutives portant chacune environ chunk entrées au plus (une clé plus lourde : seule)
+    cum = np.cumsum(load)
+    total = int(cum[-1]) if len(cum) else 0
+    return np.unique(np.concatenate(([0], np.searchsorted(cum, np.arange(chunk, total, chunk), 'right'), [len(load)])))
+
+
+class Partition:
+    # Entrées (clé, valeurs...) rangées sur disque par tranche de clés [bounds[k], bounds[k + 1]) : chaque write()
+    # ajoute un bloc trié par tranche, blocks(k) relit la tranche k bloc par bloc, dans l'ordre d'écriture
+    def __init__(self, path, bounds, dtypes):
+        self.bounds = np.asarray(bounds, dtype=np.int64)
+        self.dtypes = [np.dtype(dtype) for dtype in dtypes]
+        self.files = [open(f'{path}.part{k}', 'w+b') for k in range(len(dtypes))]
+        # Début de chaque tranche dans chaque bloc écrit
+        self.starts = []
+        self.n = 0
+
+    def __len__(self):
+        return len(self.bounds) - 1
+
+    def write(self, keys, *values):
+        part = np.searchsorted(self.bounds, keys, 'right') - 1
+        order = np.argsort(part, kind='stable')
+        for f, dtype, column in zip(self.files, self.dtypes, (keys,) + values):
+            f.write(np.asarray(column)[order].astype(dtype, copy=False).tobytes())
+        starts = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(part, minlength=len(self)), out=starts[1:])
+        self.starts.append(self.n + starts)
+        self.n += len(keys)
+
+    def blocks(self, k):
+        if not self.n:
+            return
+        for f in self.files:
+            f.flush()
+        for starts in self.starts:
+            lo, hi = int(starts[k]), int(starts[k + 1])
+            if hi > lo:
+                yield tuple(np.fromfile(f.name, dtype=dtype, count=hi - lo, offset=lo * dtype.itemsize)
+                            for f, dtype in zip(self.files, self.dtypes))
+
+    def part(self, k):
+        # Entrées de la tranche k réunies
+        blocks = list(self.blocks(k))
+        if not blocks:
+            return tuple(np.zeros(0, dtype=dtype) for dtype in self.dtypes)
+        return tuple(np.concatenate(column) for column in zip(*blocks))
+
+    def close(self):
+        for f in self.files:
+            f.close()
+            os.remove(f.name)
@@ -0,0 +1,315 @@
+import os
+
+import numpy as np
+from scipy import sparse
+
+from columns import ColumnWriter, Partition, SpillColumn, extend_column, load_bounds, read_column
+
+# Paires d'entités indexées : co-présence dans un même paragraphe (segment) d'article
+COOC_PAIRS = (('per', 'loc'), ('per', 'org'), ('kws', 'kws'))
+# Paires brutes générées par tranche avant réduction (mémoire de construction bornée)
+COOC_CHUNK = 1 << 20
+
+
+def segment_ids(article, ent, term_ids):
+    # Liste triée des ids présents dans chaque paragraphe de la liste segmentée '<ent>-l'
+    segments = []
+    for paragraph in article.get(f'{ent}-l') or []:
+        terms = {term for sentence in paragraph for term in sentence}
+        segments.append(sorted(term_ids.setdefault(t, len(term_ids)) for t in terms))
+    return segments
+
+
+def _starts(lengths):
+    # Longueurs -> débuts (tableau vide pour une liste vide)
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    return starts
+
+
+def _aligned(segments_a, segments_b, lo, hi):
+    # Paragraphes appariés des articles [lo, hi) : k-ième paragraphe de a avec le k-ième de b
+    if hi <= lo:
+        return tuple(np.zeros(0, dtype=np.int64) for _ in range(5))
+    art_a, art_b = segments_a[0][lo:hi + 1], segments_b[0][lo:hi + 1]
+    n_aligned = np.minimum(np.diff(art_a), np.diff(art_b))
+    article = np.repeat(np.arange(len(n_aligned)), n_aligned)
+    k = np.arange(len(article)) - np.repeat(_starts(n_aligned), n_aligned)
+    seg_a, seg_b = art_a[article] + k, art_b[article] + k
+    return article, seg_a, seg_b, np.diff(segments_a[1])[seg_a], np.diff(segments_b[1])[seg_b]
+
+
+def pair_triplets(segments_a, segments_b, article_day, symmetric, lo=0, hi=None):
+    # segments_x : (paragraphes par article, ids par paragraphe, ids) -> (jour, ligne, colonne) d'une co-présence
+    # par paragraphe, articles [lo, hi) ; paires symétriques rangées dans le triangle supérieur (ligne < colonne)
+    hi = len(segments_a[0]) - 1 if hi is None else hi
+    (_, ptr_a, ids_a), (_, ptr_b, ids_b) = segments_a, segments_b
+    article, seg_a, seg_b, len_a, len_b = _aligned(segments_a, segments_b, lo, hi)
+    if not len(article):
+        # Aucun paragraphe apparié (corpus vide, articles sans listes '<ent>-l')
+        return tuple(np.zeros(0, dtype=np.int64) for _ in range(3))
+    n_pairs = len_a * len_b
+    pair = np.repeat(np.arange(len(n_pairs)), n_pairs)
+    t = np.arange(len(pair)) - np.repeat(_starts(n_pairs), n_pairs)
+    i, j = t // len_b[pair], t % len_b[pair]
+    if symmetric:
+        # Un paragraphe apparié à lui-même : chaque paire de positions i < j une seule fois
+        keep = i < j
+        pair, i, j = pair[keep], i[keep], j[keep]
+    rows = ids_a[ptr_a[seg_a][pair] + i].astype(np.int64)
+    cols = ids_b[ptr_b[seg_b][pair] + j].astype(np.int64)
+    if symmetric:
+        rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+    days = np.asarray(article_day[lo:hi], dtype=np.int64)[article[pair]]
+    return days, rows, cols
+
+
+def reduce_triplets(days, rows, cols, counts, shape):
+    # Triplets pondérés -> (jour, ligne, colonne, compte) uniques, triés par jour puis ligne et colonne
+    n_a, n_b = shape
+    keys = (days.astype(np.int64) * n_a + rows) * n_b + cols
+    keys, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+    return keys // (n_a * n_b), (keys // n_b) % n_a, keys % n_b, counts
+
+
+def pair_blocks(segments_a, segments_b, article_day, shape, symmetric, chunk=COOC_CHUNK):
+    # Paires générées par tranches d'au plus ~chunk paires brutes (articles triés par jour), chaque tranche réduite ;
+    # les entrées du jour à cheval sur deux tranches sont reportées sur la suivante : blocs triés et disjoints
+    article, _, _, len_a, len_b = _aligned(segments_a, segments_b, 0, len(article_day))
+    cum = np.cumsum(np.bincount(article, weights=len_a * len_b, minlength=len(article_day)))
+    total = cum[-1] if len(cum) else 0
+    bounds = np.unique(np.concatenate(([0], np.searchsorted(cum, np.arange(chunk, total, chunk), 'right'),
+                                       [len(article_day)])))
+    carry = tuple(np.zeros(0, np.int64) for _ in range(4))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        days, rows, cols = pair_triplets(segments_a, segments_b, article_day, symmetric, lo, hi)
+        block = reduce_triplets(np.concatenate((carry[0], days)), np.concatenate((carry[1], rows)),
+                                np.concatenate((carry[2], cols)),
+                                np.concatenate((carry[3], np.ones(len(days), dtype=np.int64))), shape)
+        split = len(block[0]) if hi >= len(article_day) else int(np.searchsorted(block[0], article_day[hi], 'left'))
+        carry = tuple(x[split:] for x in block)
+        yield tuple(x[:split] for x in block)
+    if len(carry[0]):
+        yield carry
+
+
+def merged_blocks(index, old_days, days, rows, cols, n_days, shape, chunk=COOC_CHUNK):
+    # Blocs d'un index existant (jours renumérotés par old_days) fusionnés avec des triplets (jour, ligne, colonne) :
+    # tranches de jours d'environ chunk entrées existantes, ré-agrégées seulement si le lot y ajoute des paires
+    order = np.argsort(days, kind='stable')
+    days, rows, cols = days[order], rows[order], cols[order]
+    day_ptr = np.asarray(index.row_ptr[np.asarray(index.day_ptr)])
+    cuts = np.unique(np.concatenate(([0], np.searchsorted(day_ptr, np.arange(chunk, day_ptr[-1], chunk), 'right') - 1,
+                                     [len(old_days)])))
+    if len(cuts) == 1:
+        cuts = np.zeros(2, dtype=np.int64)
+    # Jours (nouveau calendrier) couverts par chaque tranche : [starts[k], starts[k + 1])
+    starts = np.zeros(len(cuts), dtype=np.int64)
+    starts[1:-1] = old_days[cuts[1:-1]]
+    starts[-1] = n_days
+    for k in range(len(cuts) - 1):
+        old = index.entries(cuts[k], cuts[k + 1])
+        old = (np.asarray(old_days)[old[0]],) + old[1:]
+        n_lo, n_hi = np.searchsorted(days, [starts[k], starts[k + 1]])
+        if n_hi == n_lo:
+            yield old
+            continue
+        yield reduce_triplets(np.concatenate((old[0], days[n_lo:n_hi])), np.concatenate((old[1], rows[n_lo:n_hi])),
+                              np.concatenate((old[2], cols[n_lo:n_hi])),
+                              np.concatenate((old[3], np.ones(n_hi - n_lo, dtype=np.int64))), shape)
+
+
+def _row_runs(days, rows):
+    # Débuts et fins des suites d'entrées de même (jour, ligne) dans des triplets triés
+    if not len(rows):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    new = np.ones(len(rows), dtype=bool)
+    new[1:] = (days[1:] != days[:-1]) | (rows[1:] != rows[:-1])
+    starts = np.flatnonzero(new)
+    return starts, np.append(starts[1:], len(rows))
+
+
+def save_cooccurrence(path, name, blocks, n_days, shape, symmetric):
+    # Blocs (jour, ligne, colonne, compte) triés par jour écrits à la suite en CSR par jour (lignes présentes ce
+    # jour-là et leurs colonnes, colonnes .npy écrites par morceaux), puis matrice totale sommée depuis ces colonnes ;
+    # une matrice symétrique est stockée complète (lignes lues en mmap)
+    columns = {col: ColumnWriter(os.path.join(path, f'{name}_{col}.npy'), dtype)
+               for col, dtype in (('rows', np.int32), ('rowptr', np.int64), ('cols', np.int32), ('data', np.int32))}
+    columns['rowptr'].write([0])
+    n_entries = 0
+    day_num = np.zeros(n_days, dtype=np.int64)
+    # Ligne de chaque entrée (relue pour la matrice totale) et entrées de la matrice totale par ligne
+    entry_rows = SpillColumn(os.path.join(path, f'{name}_entry_rows.tmp'))
+    load = np.zeros(shape[0], dtype=np.int64)
+    for day, rows, cols, counts in blocks:
+        starts, ends = _row_runs(day, rows)
+        columns['rows'].write(rows[starts])
+        columns['rowptr'].write(n_entries + ends)
+        columns['cols'].write(cols)
+        columns['data'].write(counts)
+        n_entries += len(rows)
+        day_num += np.bincount(day[starts], minlength=n_days)
+        entry_rows.frombytes(np.asarray(rows, dtype=np.int32).tobytes())
+        load += np.bincount(rows, minlength=shape[0])
+        if symmetric:
+            load += np.bincount(cols, minlength=shape[0])
+    for column in columns.values():
+        column.close()
+    day_ptr = np.zeros(n_days + 1, dtype=np.int64)
+    np.cumsum(day_num, out=day_ptr[1:])
+    np.save(os.path.join(path, f'{name}_dayptr.npy'), day_ptr)
+    entry_rows.flush()
+    try:
+        return _sum_entries(path, name, entry_rows, load, shape, symmetric)
+    finally:
+        os.remove(entry_rows.path)
+
+
+def _sum_entries(path, name, entry_rows, load, shape, symmetric, chunk=COOC_CHUNK):
+    # Matrice totale des blocs écrits : entrées (et leurs transposées pour une paire symétrique) rangées sur disque par
+    # tranches de lignes d'environ chunk entrées, chaque tranche sommée puis écrite à la suite ; une ligne plus lourde
+    # forme seule sa tranche, sommée bloc par bloc dans un vecteur dense
+    heavy = np.flatnonzero(load > chunk)
+    bounds = np.unique(np.concatenate((load_bounds(load, chunk), heavy, heavy + 1)))
+    partition = Partition(os.path.join(path, f'{name}_all'), bounds, (np.int32, np.int32, np.int32))
+    try:
+        for lo in range(0, len(entry_rows), chunk):
+            hi = min(lo + chunk, len(entry_rows))
+            rows = entry_rows.read(lo, hi)
+            cols = read_column(os.path.join(path, f'{name}_cols.npy'), lo, hi)
+            counts = read_column(os.path.join(path, f'{name}_data.npy'), lo, hi)
+            partition.write(rows, cols, counts)
+            if symmetric:
+                partition.write(cols, rows, counts)
+        n_cols = shape[1]
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        indices = ColumnWriter(os.path.join(path, f'{name}_all_indices.npy'), np.int32)
+        data = ColumnWriter(os.path.join(path, f'{name}_all_data.npy'), np.int32)
+        for k in range(len(partition)):
+            r0, r1 = int(bounds[k]), int(bounds[k + 1])
+            if r1 - r0 == 1:
+                dense = np.zeros(n_cols, dtype=np.int64)
+                for _, cols, counts in partition.blocks(k):
+                    dense += np.bincount(cols, weights=counts, minlength=n_cols).astype(np.int64)
+                cols = np.flatnonzero(dense)
+                rows, sums = np.full(len(cols), r0, dtype=np.int64), dense[cols]
+            else:
+                rows, cols, counts = partition.part(k)
+                keys, inverse = np.unique((rows.astype(np.int64) - r0) * n_cols + cols, return_inverse=True)
+                sums = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+                rows, cols = r0 + keys // n_cols, keys % n_cols
+            indptr[r0 + 1:r1 + 1] = np.bincount(rows - r0, minlength=r1 - r0)
+            indices.write(cols)
+            data.write(sums)
+        indices.close()
+        data.close()
+    finally:
+        partition.close()
+    np.cumsum(indptr, out=indptr)
+    # indptr dans le type que choisirait scipy (int32 tant que possible) : aucune conversion à l'ouverture
+    np.save(os.path.join(path, f'{name}_all_indptr.npy'),
+            indptr.astype(np.int32) if indptr[-1] <= np.iinfo(np.int32).max else indptr)
+    return _load_total(path, name, shape)
+
+
+def extend_cooccurrence(index, old_path, path, name, first, days, rows, cols, n_days, shape, symmetric):
+    # Jours ajoutés en fin de calendrier à partir du jour first (le dernier jour existant s'il reçoit des articles) :
+    # blocs des jours antérieurs repris tels quels, bloc du jour first ré-agrégé, matrice totale = ancienne + lot
+    day_ptr = np.asarray(index.day_ptr)
+    keep = int(day_ptr[first])
+    keep_entries = int(index.row_ptr[keep])
+    old = index.entries(first, len(day_ptr) - 1)
+    block = reduce_triplets(np.concatenate((old[0], days)), np.concatenate((old[1], rows)), np.concatenate((old[2], cols)),
+                            np.concatenate((old[3], np.ones(len(days), dtype=np.int64))), shape)
+    starts, ends = _row_runs(block[0], block[1])
+    extend_column(old_path, path, f'{name}_rows', keep, block[1][starts])
+    extend_column(old_path, path, f'{name}_rowptr', keep + 1, keep_entries + ends)
+    extend_column(old_path, path, f'{name}_cols', keep_entries, block[2])
+    extend_column(old_path, path, f'{name}_data', keep_entries, block[3])
+    tail = keep + np.cumsum(np.bincount(block[0][starts] - first, minlength=n_days - first))
+    np.save(os.path.join(path, f'{name}_dayptr.npy'), np.concatenate((day_ptr[:first + 1], tail)))
+    delta = sparse.csr_matrix((np.ones(len(days), dtype=np.int64), (rows, cols)), shape=shape)
+    if symmetric:
+        delta = delta + delta.T
+    old = index.total
+    indptr = np.concatenate((old.indptr, np.full(shape[0] - old.shape[0], old.indptr[-1], dtype=old.indptr.dtype)))
+    return _save_total(path, name, sparse.csr_matrix((old.data, old.indices, indptr), shape=shape) + delta)
+
+
+def _save_total(path, name, total):
+    # Matrice totale en colonnes .npy (et non .npz) : ouverte en mmap, partagée entre processus
+    total = total.tocsr()
+    total.sort_indices()
+    # indptr et indices dans le type choisi par scipy : aucune conversion (copie) à l'ouverture
+    np.save(os.path.join(path, f'{name}_all_indptr.npy'), total.indptr)
+    np.save(os.path.join(path, f'{name}_all_indices.npy'), total.indices)
+    np.save(os.path.join(path, f'{name}_all_data.npy'), total.data.astype(np.int32))
+    return total
+
+
+def _load_total(path, name, shape):
+    # Matrice totale en mmap
+    return sparse.csr_matrix((np.load(os.path.join(path, f'{name}_all_data.npy'), mmap_mode='r'),
+                              np.load(os.path.join(path, f'{name}_all_indices.npy'), mmap_mode='r'),
+                              np.load(os.path.join(path, f'{name}_all_indptr.npy'), mmap_mode='r')),
+                             shape=shape, copy=False)
+
+
+class CooccurrenceIndex:
+    # Blocs par jour en CSR (lignes présentes le jour d, leurs colonnes et comptes ; triangle supérieur seulement
+    # pour une paire symétrique) et matrice totale complète
+    def __init__(self, path, name, shape, symmetric=False):
+        self.shape, self.symmetric = shape, symmetric
+        self.day_ptr = np.load(os.path.join(path, f'{name}_dayptr.npy'), mmap_mode='r')
+        self.rows = np.load(os.path.join(path, f'{name}_rows.npy'), mmap_mode='r')
+        self.row_ptr = np.load(os.path.join(path, f'{name}_rowptr.npy'), mmap_mode='r')
+        self.cols = np.load(os.path.join(path, f'{name}_cols.npy'), mmap_mode='r')
+        self.data = np.load(os.path.join(path, f'{name}_data.npy'), mmap_mode='r')
+        self.total = _load_total(path, name, shape)
+
+    def matrix(self, lo=0, hi=None):
+        # Matrice de co-occurrence sur les jours [lo, hi)
+        n_days = len(self.day_ptr) - 1
+        hi = n_days if hi is None else hi
+        if lo <= 0 and hi >= n_days:
+            return self.total
+        _, rows, cols, data = self.entries(lo, hi)
+        matrix = sparse.csr_matrix((data, (rows, cols)), shape=self.shape, dtype=np.int64)
+        return (matrix + matrix.T).tocsr() if self.symmetric else matrix
+
+    def row(self, i, lo=0, hi=None):
+        # (colonnes, comptes) de la ligne i sur les jours [lo, hi), sans construire la matrice de l'intervalle :
+        # entrées de la ligne i retrouvées par les lignes présentes chaque jour, et pour une paire symétrique entrées
+        # (j, i) du triangle supérieur retrouvées par leur colonne
+        n_days = len(self.day_ptr) - 1
+        hi = n_days if hi is None else hi
+        if lo <= 0 and hi >= n_days:
+            a, b = self.total.indptr[i], self.total.indptr[i + 1]
+            return np.asarray(self.total.indices[a:b], dtype=np.int64), np.asarray(self.total.data[a:b], dtype=np.int64)
+        a, b = int(self.day_ptr[lo]), int(self.day_ptr[hi])
+        hits = a + np.flatnonzero(self.rows[a:b] == i)
+        starts, ends = self.row_ptr[hits], self.row_ptr[hits + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - _starts(lengths), lengths) + np.arange(lengths.sum())
+        cols, counts = [self.cols[positions]], [self.data[positions]]
+        if self.symmetric:
+            p, q = int(self.row_ptr[a]), int(self.row_ptr[b])
+            below = p + np.flatnonzero(self.cols[p:q] == i)
+            cols.append(self.rows[np.searchsorted(self.row_ptr, below, 'right') - 1])
+            counts.append(self.data[below])
+        counts = np.bincount(np.concatenate(cols), weights=np.concatenate(counts), minlength=self.total.shape[1])
+        cols = np.flatnonzero(counts)
+        return cols, counts[cols].astype(np.int64)
+
+    def entries(self, lo, hi):
+        # (jour, ligne, colonne, compte) des jours [lo, hi)
+        a, b = int(self.day_ptr[lo]), int(self.day_ptr[hi])
+        lengths = np.diff(self.row_ptr[a:b + 1])
+        days = np.repeat(np.repeat(np.arange(lo, hi), np.diff(self.day_ptr[lo:hi + 1])), lengths)
+        p, q = int(self.row_ptr[a]), int(self.row_ptr[b])
+        return (days, np.repeat(np.asarray(self.rows[a:b], dtype=np.int64), lengths),
+                np.asarray(self.cols[p:q], dtype=np.int64), np.asarray(self.data[p:q], dtype=np.int64))
+
+    def submatrix(self, row_ids, col_ids, lo=0, hi=None):
+        return self.matrix(lo, hi)[row_ids][:, col_ids].toarray()
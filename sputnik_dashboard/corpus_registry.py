@@ -0,0 +1,174 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from bursts import Bursts
+from corpus_store import DATA_DIR, ENTITY_TYPES, CorpusStore, open_store
+from vocabulary import Vocabulary, top_n
+
+CORPUS_PREFIX = 'fr.sputniknews.africa-'
+MEMORY_BUDGET_MB = float(os.environ.get('SPUTNIK_MEMORY_BUDGET_MB', '1024'))
+# Intervalle (secondes) entre deux vérifications de nouvelle version d'un store chargé
+RELOAD_INTERVAL = float(os.environ.get('SPUTNIK_RELOAD_INTERVAL', '5'))
+
+logger = logging.getLogger(__name__)
+
+
+def corpus_label(filename):
+    # 'fr.sputniknews.africa-france-macron.json' -> 'Macron/France'
+    name = os.path.splitext(filename)[0][len(CORPUS_PREFIX):]
+    return '/'.join(part.capitalize() for part in reversed(name.split('-')))
+
+
+def store_nbytes(store):
+    return sum(entry.stat().st_size for entry in os.scandir(store.path) if entry.is_file())
+
+
+class CorpusRegistry:
+    def __init__(self, data_dir=DATA_DIR, memory_budget_mb=MEMORY_BUDGET_MB, reload_interval=RELOAD_INTERVAL):
+        self.data_dir = data_dir
+        self.reload_interval = reload_interval
+        self._checked = {}
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.sources = {}
+        self.failed = {}
+        self._loaded = OrderedDict()
+        # Vocabulaire global par type d'entité et correspondance ids locaux -> ids globaux par corpus
+        self.vocabularies = {ent: Vocabulary() for ent in ENTITY_TYPES}
+        self._remaps = {}
+        self._combined = {}
+        self._bursts = {}
+        self._lock = threading.RLock()
+        self.refresh()
+
+    def refresh(self):
+        # Découverte des corpus : aucun fichier n'est lu ici
+        try:
+            files = sorted(f for f in os.listdir(self.data_dir) if f.startswith(CORPUS_PREFIX) and f.endswith('.json'))
+        except OSError:
+            logger.warning("Dossier de corpus introuvable : %s", self.data_dir)
+            files = []
+        self.sources = OrderedDict((corpus_label(f), os.path.join(self.data_dir, f)) for f in files)
+        return list(self.sources)
+
+    def names(self):
+        return [name for name in self.sources if name not in self.failed]
+
+    def get(self, name):
+        # Chargement paresseux au premier accès, None si le corpus est absent ou illisible
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                store = self._loaded[name][0]
+                if not self._reload_due(name, store):
+                    return store
+                return self._reload(name, store)
+            if name not in self.sources or name in self.failed:
+                return None
+            try:
+                store = open_store(self.sources[name])
+            except Exception as e:
+                logger.warning("Corpus %s ignoré : %s", name, e)
+                self.failed[name] = str(e)
+                return None
+            self._loaded[name] = (store, store_nbytes(store))
+            self._checked[name] = time.monotonic()
+            self._evict()
+            return store
+
+    def _reload_due(self, name, store):
+        now = time.monotonic()
+        if now - self._checked.get(name, 0) < self.reload_interval:
+            return False
+        self._checked[name] = now
+        return store.is_stale()
+
+    def _reload(self, name, store):
+        # Nouvelle version écrite par un ajout incrémental : ré-ouverture et oubli des agrégats dérivés du corpus
+        try:
+            fresh = CorpusStore(store.store_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Rechargement de %s impossible : %s", name, e)
+            return store
+        logger.info("Corpus %s rechargé (version %s)", name, fresh.manifest.get('version'))
+        self._loaded[name] = (fresh, store_nbytes(fresh))
+        for key in [key for key in self._remaps if key[0] == name]:
+            del self._remaps[key]
+        for key in [key for key in self._combined if name in key[0]]:
+            del self._combined[key]
+        for key in [key for key in self._bursts if name in key[0]]:
+            del self._bursts[key]
+        return fresh
+
+    def _evict(self):
+        # Éviction LRU des corpus froids au-delà du budget (le plus récent est toujours conservé)
+        while len(self._loaded) > 1 and sum(size for _, size in self._loaded.values()) > self.memory_budget:
+            name, _ = self._loaded.popitem(last=False)
+            logger.info("Corpus %s évincé du cache", name)
+
+    def stores(self, names=None):
+        result = []
+        for name in (self.names() if names is None else names):
+            store = self.get(name)
+            if store is not None:
+                result.append((name, store))
+        return result
+
+    def data_version(self, names, start=None, end=None):
+        # Empreinte des données d'un intervalle : change seulement si un ajout touche des jours de l'intervalle
+        return tuple((name, store.manifest.get('build_id'), store.changed_since(start, end))
+                     for name, store in self.stores(names))
+
+    def remap(self, name, store, ent):
+        with self._lock:
+            if (name, ent) not in self._remaps:
+                self._remaps[(name, ent)] = self.vocabularies[ent].intern(store.vocab[ent])
+            return self._remaps[(name, ent)]
+
+    def counts(self, names, ent, start=None, end=None):
+        # Vecteur dense de comptes sur le vocabulaire global ; les totaux complets sont mis en cache
+        stores = self.stores(names)
+        full = all(store.is_full_range(start, end) for _, store in stores)
+        key = (tuple(name for name, _ in stores), ent)
+        if full and key in self._combined:
+            return self._combined[key]
+        parts = [(self.remap(name, store, ent), store.counts(ent, start, end)) for name, store in stores]
+        counts = np.zeros(len(self.vocabularies[ent]), dtype=np.int64)
+        for ids, store_counts in parts:
+            counts[ids] += store_counts
+        if full:
+            self._combined[key] = counts
+        return counts
+
+    def top(self, names, ent, n, start=None, end=None):
+        # Top-N : vecteur local pour un seul corpus, vecteur global fusionné sinon
+        stores = self.stores(names)
+        if len(stores) == 1:
+            return stores[0][1].top(ent, n, start, end)
+        counts = self.counts(names, ent, start, end)
+        ids = top_n(counts, n)
+        terms = self.vocabularies[ent].terms
+        return [terms[i] for i in ids], counts[ids]
+
+    def distinct(self, names, ent, start=None, end=None):
+        stores = self.stores(names)
+        if len(stores) == 1:
+            return int(np.count_nonzero(stores[0][1].counts(ent, start, end)))
+        return int(np.count_nonzero(self.counts(names, ent, start, end)))
+
+    def bursts(self, names, ent):
+        # (pics, vocabulaire) : pré-calculés à l'ingestion pour un corpus, détectés sur les comptes mensuels fusionnés
+        # (vocabulaire global) pour une combinaison, une fois par combinaison
+        stores = self.stores(names)
+        if len(stores) == 1:
+            return stores[0][1].bursts[ent], stores[0][1].vocab[ent]
+        key = (tuple(name for name, _ in stores), ent)
+        with self._lock:
+            if key not in self._bursts:
+                parts = [(store.bursts[ent], self.remap(name, store, ent)) for name, store in stores]
+                self._bursts[key] = Bursts.combine(parts, len(self.vocabularies[ent]))
+            return self._bursts[key], self.vocabularies[ent].terms
@@ -0,0 +1,1025 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import shutil
+import argparse
+import tempfile
+from array import array
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from bursts import (BURST_ENTITIES, Bursts, build_bursts, extend_bursts, month_calendar, month_sums, monthly_counts,
+                    save_months)
+from columns import SPILL_CHUNK, ColumnWriter, CSRWriter, SpillColumn, extend_column, extend_csr
+from cooccurrence import (COOC_PAIRS, CooccurrenceIndex, extend_cooccurrence, merged_blocks, pair_blocks, pair_triplets,
+                          save_cooccurrence, segment_ids)
+from keyword_network import NETWORK_WEIGHTS, build_neighbors
+from search_index import PostingIndex, build_postings, extend_postings, posting_writer, term_lookup
+from timeseries import DailySeries
+from vocabulary import Vocabulary, top_n
+
+ENTITY_TYPES = ('kws', 'loc', 'org', 'per')
+STORE_FORMAT = 13
+# Jours entre deux points de contrôle des sommes cumulées par terme
+CUM_STEP = 7
+SEGMENT_ENTITIES = tuple(sorted({e for pair in COOC_PAIRS for e in pair}))
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get('SPUTNIK_DATA_DIR', os.path.join(BASE_DIR, 'fr.sputniknews.africa-2025', 'data'))
+STORE_DIR = os.environ.get('SPUTNIK_STORE_DIR', os.path.join(BASE_DIR, 'fr.sputniknews.africa-2025', 'store'))
+INGEST_WORKERS = int(os.environ.get('SPUTNIK_INGEST_WORKERS', '1'))
+# Dossier des colonnes temporaires d'ingestion (défaut : dossier temporaire du système)
+SPILL_DIR = os.environ.get('SPUTNIK_SPILL_DIR') or None
+# Mentions (termes et ids de paragraphes) relues par tranche de jours à l'écriture du store
+WRITE_CHUNK = 1 << 20
+# Âge (s) au-delà duquel un dossier de version inachevé (écriture interrompue) est supprimé
+VERSION_TMP_TTL = 24 * 3600
+
+
+# Lecture du corpus source
+def in_part(year, month, part):
+    # part = (k, n) : mois attribués au k-ième des n processus d'ingestion
+    return part is None or (int(year) * 12 + int(month)) % part[1] == part[0]
+
+
+def iter_articles(json_path, part=None):
+    # Lecture en flux (ijson) : un seul article en mémoire à la fois, metadata et mois hors partie ignorés
+    if ijson is None:
+        yield from _load_articles(json_path, part)
+        return
+    with open(json_path, 'rb') as f:
+        builder, article_prefix, day = None, None, None
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if event == 'end_map' and prefix == article_prefix:
+                    yield day, builder.value
+                    builder = None
+            elif event == 'start_map' and prefix.startswith('data.') and prefix.endswith('.item') and prefix.count('.') == 4:
+                _, year, month, d, _ = prefix.split('.')
+                if in_part(year, month, part):
+                    day, article_prefix = date(int(year), int(month), int(d)), prefix
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+
+
+def _load_articles(json_path, part=None):
+    # Sans ijson : document chargé en entier
+    with open(json_path, 'r', encoding='utf-8') as f:
+        doc = json.load(f)
+    for year, months in doc['data'].items():
+        for month, days in months.items():
+            if in_part(year, month, part):
+                for day, articles in days.items():
+                    for article in articles:
+                        yield date(int(year), int(month), int(day)), article
+
+
+def iter_batch(jsonl_path):
+    # Lot de nouveaux articles : un article JSON par ligne, jour de publication lu dans 'date' (sinon 'timestamp')
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                article = json.loads(line)
+                day = article.get('date')
+                yield (date.fromisoformat(day[:10]) if day else date.fromtimestamp(int(article['timestamp']))), article
+
+
+# Construction du store colonne
+class StringBuffer:
+    # Chaînes encodées à la suite (octets écrits sur disque par blocs) et longueurs : aucun objet str conservé par article
+    def __init__(self, path):
+        self.blob = SpillColumn(path, 'B')
+        self.lengths = array('i')
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def append(self, s):
+        encoded = s.encode('utf-8')
+        self.blob.frombytes(encoded)
+        self.lengths.append(len(encoded))
+
+    def extend(self, other):
+        self.blob.copy_from(other.blob)
+        self.lengths.extend(other.lengths)
+
+    def take(self, order):
+        # Chaînes encodées dans l'ordre donné
+        ptr, positions = _row_positions(_lengths_ptr(self.lengths), order)
+        blob = self.blob.take(positions).tobytes()
+        return [blob[ptr[k]:ptr[k + 1]] for k in range(len(ptr) - 1)]
+
+    def __iter__(self):
+        offsets = _lengths_ptr(self.lengths)
+        for lo in range(0, len(self), 4096):
+            hi = min(lo + 4096, len(self))
+            blob = self.blob.read(offsets[lo], offsets[hi]).tobytes()
+            yield from (blob[a:b].decode('utf-8') for a, b in zip(offsets[lo:hi] - offsets[lo], offsets[lo + 1:hi + 1] - offsets[lo]))
+
+
+class StoreBuilder:
+    # Articles accumulés dans des tableaux plats : quelques entiers par article en mémoire (array), mentions, ids de
+    # paragraphes et chaînes écrits sur disque par blocs (SpillColumn) ; un builder partiel se sérialise en quelques
+    # tampons et chemins de fichiers (ingestion parallèle, processus d'une même machine)
+    def __init__(self, spill_dir=SPILL_DIR):
+        self.dir = tempfile.mkdtemp(prefix='sputnik-builder-', dir=spill_dir)
+        self.vocab = {ent: {} for ent in ENTITY_TYPES}
+        self.ordinals, self.timestamps = array('i'), array('q')
+        self.urls, self.titles = StringBuffer(self._spill('urls')), StringBuffer(self._spill('titles'))
+        # Termes des articles : ids et comptes à la suite, nombre de termes de chaque article
+        self.ids = {ent: SpillColumn(self._spill(f'{ent}_ids')) for ent in ENTITY_TYPES}
+        self.counts = {ent: SpillColumn(self._spill(f'{ent}_counts')) for ent in ENTITY_TYPES}
+        self.lengths = {ent: array('i') for ent in ENTITY_TYPES}
+        # Paragraphes : ids triés à la suite et taille de chaque paragraphe, nombre de paragraphes et d'ids de chaque
+        # article
+        self.seg_ids = {ent: SpillColumn(self._spill(f'{ent}_seg_ids')) for ent in SEGMENT_ENTITIES}
+        self.seg_lengths = {ent: SpillColumn(self._spill(f'{ent}_seg_lengths')) for ent in SEGMENT_ENTITIES}
+        self.seg_counts, self.seg_sizes = ({ent: array('i') for ent in SEGMENT_ENTITIES} for _ in range(2))
+
+    def _spill(self, name):
+        return os.path.join(self.dir, name)
+
+    def close(self):
+        # Colonnes temporaires supprimées (builder écrit ou abandonné)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    @property
+    def n_articles(self):
+        return len(self.ordinals)
+
+    def add(self, day, article):
+        self.ordinals.append(day.toordinal())
+        self.timestamps.append(int(article.get('timestamp') or 0))
+        self.urls.append(article.get('url', ''))
+        self.titles.append(article.get('title', ''))
+        for ent in ENTITY_TYPES:
+            counts, ids = article.get(ent) or {}, self.vocab[ent]
+            self.ids[ent].extend(ids.setdefault(term, len(ids)) for term in counts)
+            self.counts[ent].extend(int(c) for c in counts.values())
+            self.lengths[ent].append(len(counts))
+        for ent in SEGMENT_ENTITIES:
+            segments = segment_ids(article, ent, self.vocab[ent])
+            self.seg_ids[ent].extend(i for seg in segments for i in seg)
+            self.seg_lengths[ent].extend(len(seg) for seg in segments)
+            self.seg_counts[ent].append(len(segments))
+            self.seg_sizes[ent].append(sum(len(seg) for seg in segments))
+
+    def merge(self, other):
+        # Ajout des articles d'un autre builder (ingestion parallèle), ids locaux convertis dans ce vocabulaire
+        remaps = {}
+        for ent in ENTITY_TYPES:
+            ids = self.vocab[ent]
+            remaps[ent] = np.array([ids.setdefault(term, len(ids)) for term in other.vocab[ent]], dtype=np.int32)
+        self.ordinals.extend(other.ordinals)
+        self.timestamps.extend(other.timestamps)
+        self.urls.extend(other.urls)
+        self.titles.extend(other.titles)
+        for ent in ENTITY_TYPES:
+            self.ids[ent].copy_from(other.ids[ent], remaps[ent])
+            self.counts[ent].copy_from(other.counts[ent])
+            self.lengths[ent].extend(other.lengths[ent])
+        for ent in SEGMENT_ENTITIES:
+            self.seg_ids[ent].copy_from(other.seg_ids[ent], remaps[ent])
+            self.seg_lengths[ent].copy_from(other.seg_lengths[ent])
+            self.seg_counts[ent].extend(other.seg_counts[ent])
+            self.seg_sizes[ent].extend(other.seg_sizes[ent])
+        return self
+
+    def order(self):
+        # Articles triés par date puis horodatage (tri stable : ordre de lecture pour les ex aequo)
+        return np.lexsort((np.frombuffer(self.timestamps, dtype=np.int64), _ints(self.ordinals)))
+
+    def rows(self, ent, order):
+        # CSR article x terme (ids du builder), articles dans l'ordre donné
+        indptr, positions = _row_positions(_lengths_ptr(self.lengths[ent]), order)
+        return indptr, self.ids[ent].take(positions), self.counts[ent].take(positions)
+
+    def segments(self, ent, order):
+        # (paragraphes par article, ids par paragraphe, ids) : deux CSR imbriquées, articles dans l'ordre donné
+        art_ptr, seg_rows = _row_positions(_lengths_ptr(self.seg_counts[ent]), order)
+        seg_ptr = np.zeros(len(seg_rows) + 1, dtype=np.int64)
+        np.cumsum(self.seg_lengths[ent].take(seg_rows), out=seg_ptr[1:])
+        _, positions = _row_positions(_lengths_ptr(self.seg_sizes[ent]), order)
+        return art_ptr, seg_ptr, self.seg_ids[ent].take(positions)
+
+    def _term_counts(self, ent):
+        # Mentions et nombre d'articles de chaque terme (ids du builder), colonnes relues à la suite
+        n_terms = len(self.vocab[ent])
+        totals, df = np.zeros(n_terms, dtype=np.int64), np.zeros(n_terms, dtype=np.int64)
+        for lo in range(0, len(self.ids[ent]), SPILL_CHUNK):
+            ids = self.ids[ent].read(lo, lo + SPILL_CHUNK)
+            totals += np.bincount(ids, weights=self.counts[ent].read(lo, lo + SPILL_CHUNK), minlength=n_terms).astype(np.int64)
+            df += np.bincount(ids, minlength=n_terms)
+        return totals, df
+
+    def _chunks(self, order, day_num, chunk=WRITE_CHUNK):
+        # Tranches [lo, hi) de lignes (articles triés) formées de jours entiers, d'environ chunk mentions chacune
+        load = sum(_ints(self.lengths[ent]).astype(np.int64) for ent in ENTITY_TYPES)
+        load = load + sum(_ints(self.seg_sizes[ent]) for ent in SEGMENT_ENTITIES)
+        day_end = np.cumsum(day_num)
+        if not len(day_end):
+            return []
+        day_load = np.cumsum(load[order])[day_end - 1]
+        cuts = np.unique(np.concatenate(([0], day_end[np.searchsorted(day_load, np.arange(chunk, day_load[-1], chunk))],
+                                         [day_end[-1]])))
+        return list(zip(cuts[:-1], cuts[1:]))
+
+    def _pair_blocks(self, a_ent, b_ent, order, chunks, article_day, remaps):
+        # Blocs de co-occurrence tranche par tranche (jours entiers : aucun jour partagé entre deux tranches)
+        shape = (len(remaps[a_ent]), len(remaps[b_ent]))
+        for lo, hi in chunks:
+            art_ptr, seg_ptr, ids = self.segments(a_ent, order[lo:hi])
+            segments_a = art_ptr, seg_ptr, remaps[a_ent][ids].astype(np.int32)
+            if b_ent == a_ent:
+                segments_b = segments_a
+            else:
+                art_ptr, seg_ptr, ids = self.segments(b_ent, order[lo:hi])
+                segments_b = art_ptr, seg_ptr, remaps[b_ent][ids].astype(np.int32)
+            yield from pair_blocks(segments_a, segments_b, article_day[lo:hi], shape, a_ent == b_ent)
+
+    def write(self, path, manifest=None):
+        # Articles triés par date : une période = une plage contiguë de lignes. Colonnes du builder relues par tranches
+        # de jours entiers et fichiers du store écrits à la suite, tranche par tranche : la mémoire ne dépend pas du
+        # nombre de mentions ni de paires
+        order = self.order()
+        days, article_day, day_num = np.unique(_ints(self.ordinals)[order], return_inverse=True, return_counts=True)
+        chunks = self._chunks(order, day_num)
+
+        tmp = _version_dir(path)
+        np.save(os.path.join(tmp, 'days.npy'), days.astype(np.int32))
+        np.save(os.path.join(tmp, 'day_num.npy'), day_num.astype(np.int32))
+        np.save(os.path.join(tmp, 'article_day.npy'), article_day.astype(np.int32))
+        np.save(os.path.join(tmp, 'article_ts.npy'), np.frombuffer(self.timestamps, dtype=np.int64)[order])
+        _write_bytes(tmp, 'article_url', (self.urls.take(order[lo:hi]) for lo, hi in chunks))
+        _write_bytes(tmp, 'article_title', (self.titles.take(order[lo:hi]) for lo, hi in chunks))
+        save_months(tmp, days, day_num)
+        months, month_row, month_num = month_calendar(days, day_num)
+
+        remaps = {}
+        for ent in ENTITY_TYPES:
+            # Matrice article x terme (CSR), ids renumérotés par fréquence décroissante
+            terms = list(self.vocab[ent])
+            n_terms = len(terms)
+            totals, df = self._term_counts(ent)
+            # Égalités départagées par le terme : même numérotation quel que soit l'ordre de lecture
+            order_terms = np.array(sorted(range(n_terms), key=lambda i: (-totals[i], terms[i])), dtype=np.int64)
+            remap = np.empty_like(order_terms)
+            remap[order_terms] = np.arange(len(order_terms))
+            remaps[ent] = remap
+
+            with open(os.path.join(tmp, f'vocab_{ent}.json'), 'w', encoding='utf-8') as f:
+                json.dump([terms[i] for i in order_terms], f, ensure_ascii=False)
+            np.save(os.path.join(tmp, f'{ent}_all.npy'), totals[order_terms])
+            by_article, by_day = CSRWriter(tmp, f'{ent}_art'), CSRWriter(tmp, f'{ent}_day')
+            postings = posting_writer(tmp, ent, df[order_terms], self.n_articles)
+            cumulative = PrefixSums(tmp, f'{ent}_cum', len(days), n_terms)
+            by_month = sparse.csr_matrix((len(months), n_terms))
+            for lo, hi in chunks:
+                indptr, indices, data = self.rows(ent, order[lo:hi])
+                indices = remap[indices].astype(np.int32)
+                d0, d1 = article_day[lo], article_day[hi - 1] + 1
+                day_csr = _group_rows(indptr, indices, data, article_day[lo:hi] - d0, d1 - d0, n_terms)
+                by_article.write(indptr, indices, data)
+                postings.write(indptr, indices)
+                by_day.write(*day_csr)
+                cumulative.write(*day_csr)
+                if ent in BURST_ENTITIES:
+                    by_month = by_month + month_sums(month_row[d0:d1], len(months), *day_csr, n_terms)
+            for writer in (by_article, postings, by_day, cumulative):
+                writer.close()
+            if ent in BURST_ENTITIES:
+                build_bursts(tmp, ent, months, month_num, by_month)
+
+        # Paragraphes par jour et nombre de paragraphes contenant chaque terme (marginales PMI par intervalle)
+        segments_per_article = _ints(self.seg_counts['kws'])[order]
+        np.save(os.path.join(tmp, 'day_segments.npy'),
+                np.bincount(article_day, weights=segments_per_article, minlength=len(days)).astype(np.int64))
+        n_segments = int(segments_per_article.sum())
+        for ent in SEGMENT_ENTITIES:
+            n_terms = len(remaps[ent])
+            seg_freq = np.zeros(n_terms, dtype=np.int64)
+            seg_day = CSRWriter(tmp, f'{ent}_segday')
+            for lo, hi in chunks:
+                art_ptr, seg_ptr, ids = self.segments(ent, order[lo:hi])
+                ids = remaps[ent][ids].astype(np.int32)
+                d0, d1 = article_day[lo], article_day[hi - 1] + 1
+                seg_freq += np.bincount(ids, minlength=n_terms)
+                seg_day.write(*_group_rows(seg_ptr, ids, np.ones(len(ids), dtype=np.int32),
+                                           np.repeat(article_day[lo:hi] - d0, np.diff(art_ptr)), d1 - d0, n_terms))
+            seg_day.close()
+            np.save(os.path.join(tmp, f'{ent}_segfreq.npy'), seg_freq.astype(np.int32))
+        for a_ent, b_ent in COOC_PAIRS:
+            total = save_cooccurrence(tmp, f'cooc_{a_ent}_{b_ent}', self._pair_blocks(a_ent, b_ent, order, chunks, article_day, remaps),
+                                      len(days), (len(remaps[a_ent]), len(remaps[b_ent])), a_ent == b_ent)
+            if a_ent == b_ent == 'kws':
+                build_neighbors(tmp, total, np.load(os.path.join(tmp, 'kws_segfreq.npy')), n_segments,
+                                np.load(os.path.join(tmp, 'kws_all.npy')))
+
+        manifest = dict(manifest or {})
+        manifest.update({'format': STORE_FORMAT, 'n_articles': self.n_articles, 'n_days': int(len(days)),
+                         'n_segments': n_segments,
+                         'entity_types': list(ENTITY_TYPES),
+                         'build_id': uuid.uuid4().hex, 'version': 1, 'changes': []})
+        _commit(tmp, path, manifest)
+
+    def extend(self, store, path):
+        # Fusion avec un store existant dans une nouvelle version : ids existants conservés, nouveaux termes en fin
+        # de vocabulaire. Cas courant (articles tous postérieurs au dernier article du store) : colonnes prolongées,
+        # seuls les derniers jours sont recalculés ; sinon lignes ré-ordonnées et colonnes réécrites
+        new_order = self.order()
+        new_ordinals = _ints(self.ordinals)[new_order].astype(np.int64)
+        new_ts = np.frombuffer(self.timestamps, dtype=np.int64)[new_order]
+        tmp = _version_dir(path)
+        if not store.n_articles or (new_ordinals[0], new_ts[0]) >= (store.days[store.article_day[-1]], store.article_ts[-1]):
+            n_articles, n_days, n_segments = self._append(store, tmp, new_order, new_ordinals, new_ts)
+        else:
+            n_articles, n_days, n_segments = self._merge(store, tmp, new_order, new_ordinals, new_ts)
+
+        # Version incrémentée et intervalle modifié : les caches des autres périodes restent valides
+        manifest = dict(store.manifest)
+        version = manifest.get('version', 1) + 1
+        manifest.update({'n_articles': n_articles, 'n_days': n_days, 'n_segments': n_segments,
+                         'version': version,
+                         'changes': manifest.get('changes', []) + [{
+                             'version': version,
+                             'first_day': date.fromordinal(int(new_ordinals.min())).isoformat(),
+                             'last_day': date.fromordinal(int(new_ordinals.max())).isoformat()}]})
+        _commit(tmp, path, manifest)
+
+    def _merged_terms(self, store, tmp, new_order):
+        # Vocabulaires fusionnés (écrits), ids du builder -> ids du store, totaux et CSR des nouveaux articles
+        remaps, sizes, totals, rows = {}, {}, {}, {}
+        for ent in ENTITY_TYPES:
+            vocab = Vocabulary()
+            vocab.intern(store.vocab[ent])
+            remap = remaps[ent] = vocab.intern(list(self.vocab[ent]))
+            n_terms = sizes[ent] = len(vocab)
+            indptr, indices, data = self.rows(ent, new_order)
+            rows[ent] = indptr, remap[indices].astype(np.int32), data
+            totals[ent] = _pad(store.totals[ent], n_terms) + np.bincount(rows[ent][1], weights=data, minlength=n_terms).astype(np.int64)
+            with open(os.path.join(tmp, f'vocab_{ent}.json'), 'w', encoding='utf-8') as f:
+                json.dump(vocab.terms, f, ensure_ascii=False)
+            np.save(os.path.join(tmp, f'{ent}_all.npy'), totals[ent])
+        return remaps, sizes, totals, rows
+
+    def _merged_segments(self, store, tmp, new_order, remaps, sizes):
+        # Paragraphes des nouveaux articles (ids du store) et nombre de paragraphes contenant chaque terme
+        segments = {}
+        for ent in SEGMENT_ENTITIES:
+            art_ptr, seg_ptr, ids = self.segments(ent, new_order)
+            segments[ent] = art_ptr, seg_ptr, remaps[ent][ids].astype(np.int32)
+            np.save(os.path.join(tmp, f'{ent}_segfreq.npy'),
+                    (_pad(store.seg_totals[ent], sizes[ent]) + np.bincount(segments[ent][2], minlength=sizes[ent])).astype(np.int32))
+        return segments
+
+    def _append(self, store, tmp, new_order, new_ordinals, new_ts):
+        # Articles ajoutés après le dernier article : lignes existantes inchangées, colonnes prolongées à partir du
+        # jour first (dernier jour existant s'il reçoit des articles, sinon premier jour ajouté) ; sommes cumulées,
+        # blocs de co-occurrence et pics antérieurs repris, segments d'index existants liés
+        old, n_old, old_n_days = store.path, store.n_articles, len(store.days)
+        new_day_ordinals, new_day_num = np.unique(new_ordinals, return_counts=True)
+        first = old_n_days - 1 if old_n_days and new_day_ordinals[0] == store.days[-1] else old_n_days
+        new_days = first + np.searchsorted(new_day_ordinals, new_ordinals)
+        # Nouvelles lignes jour x terme (jours [first, n_days)) : ligne existante du jour first éventuelle + articles
+        n_tail = len(new_day_ordinals)
+        old_tail = np.zeros(old_n_days - first, dtype=np.int64)
+        day_num = np.concatenate((store.day_num[:first], new_day_num + _pad(store.day_num[first:], n_tail)))
+        day_segments = np.asarray(store.day_segments)
+        extend_column(old, tmp, 'days', first, new_day_ordinals)
+        extend_column(old, tmp, 'day_num', first, day_num[first:])
+        extend_column(old, tmp, 'article_day', n_old, new_days)
+        extend_column(old, tmp, 'article_ts', n_old, new_ts)
+        _extend_strings(old, tmp, 'article_url', self.urls.take(new_order))
+        _extend_strings(old, tmp, 'article_title', self.titles.take(new_order))
+        days = np.load(os.path.join(tmp, 'days.npy'))
+        save_months(tmp, days, day_num)
+
+        remaps, sizes, totals, rows = self._merged_terms(store, tmp, new_order)
+        for ent in ENTITY_TYPES:
+            n_terms = sizes[ent]
+            extend_csr(old, tmp, f'{ent}_art', n_old, rows[ent])
+            art = CSRColumn(tmp, f'{ent}_art', n_terms)
+            extend_postings(old, tmp, ent, art.indptr, art.indices, n_terms, n_old)
+            extend_csr(old, tmp, f'{ent}_day', first, _group_rows(
+                *_concat_rows(store.by_day[ent].rows(first, old_n_days), rows[ent]),
+                np.concatenate((old_tail, new_days - first)), n_tail, n_terms))
+            day = CSRColumn(tmp, f'{ent}_day', n_terms)
+            _save_prefix_sums(tmp, f'{ent}_cum', day.indptr, day.indices, day.data, n_terms, store.cumulative[ent], first)
+            if ent in BURST_ENTITIES:
+                extend_bursts(old, tmp, ent, store.bursts[ent], days, day_num, (day.indptr, day.indices, day.data),
+                              n_terms, first)
+
+        segments = self._merged_segments(store, tmp, new_order, remaps, sizes)
+        segments_per_article = np.diff(segments['kws'][0])
+        extend_column(old, tmp, 'day_segments', first, _pad(day_segments[first:], n_tail)
+                      + np.bincount(new_days - first, weights=segments_per_article, minlength=n_tail).astype(np.int64))
+        n_segments = store.n_segments + int(segments_per_article.sum())
+        for ent in SEGMENT_ENTITIES:
+            art_ptr, seg_ptr, ids = segments[ent]
+            extend_csr(old, tmp, f'{ent}_segday', first, _group_rows(
+                *_concat_rows(store.seg_by_day[ent].rows(first, old_n_days), (seg_ptr, ids, np.ones(len(ids), dtype=np.int32))),
+                np.concatenate((old_tail, np.repeat(new_days - first, np.diff(art_ptr)))), n_tail, sizes[ent]))
+        for a_ent, b_ent in COOC_PAIRS:
+            shape, symmetric = (sizes[a_ent], sizes[b_ent]), a_ent == b_ent
+            new = pair_triplets(segments[a_ent], segments[b_ent], new_days, symmetric)
+            total = extend_cooccurrence(store.cooccurrence(a_ent, b_ent), old, tmp, f'cooc_{a_ent}_{b_ent}', first, *new,
+                                        len(days), shape, symmetric)
+            if a_ent == b_ent == 'kws':
+                build_neighbors(tmp, total, np.load(os.path.join(tmp, 'kws_segfreq.npy')), n_segments, totals['kws'])
+        return n_old + len(new_ordinals), len(days), n_segments
+
+    def _merge(self, store, tmp, new_order, new_ordinals, new_ts):
+        # Articles insérés parmi les jours existants : lignes ré-ordonnées, colonnes par article et index réécrits,
+        # agrégats existants ré-indexés sur le nouveau calendrier plutôt que recalculés
+        n_old = store.n_articles
+        ordinals = np.concatenate((np.asarray(store.days, dtype=np.int64)[store.article_day], new_ordinals))
+        timestamps = np.concatenate((store.article_ts, new_ts))
+        order = np.lexsort((timestamps, ordinals))
+        days, article_day, day_num = np.unique(ordinals[order], return_inverse=True, return_counts=True)
+        # Indices des jours existants et des jours des nouveaux articles dans le nouveau calendrier
+        old_days = np.searchsorted(days, store.days)
+        new_days = np.searchsorted(days, new_ordinals)
+        row_days = np.concatenate((old_days, new_days))
+
+        np.save(os.path.join(tmp, 'days.npy'), days.astype(np.int32))
+        np.save(os.path.join(tmp, 'day_num.npy'), day_num.astype(np.int32))
+        np.save(os.path.join(tmp, 'article_day.npy'), article_day.astype(np.int32))
+        np.save(os.path.join(tmp, 'article_ts.npy'), timestamps[order])
+        urls = [store.urls[i] for i in range(n_old)] + [b.decode('utf-8') for b in self.urls.take(new_order)]
+        titles = [store.titles[i] for i in range(n_old)] + [b.decode('utf-8') for b in self.titles.take(new_order)]
+        _write_strings(tmp, 'article_url', [urls[i] for i in order])
+        _write_strings(tmp, 'article_title', [titles[i] for i in order])
+        save_months(tmp, days, day_num)
+
+        remaps, sizes, totals, rows = self._merged_terms(store, tmp, new_order)
+        for ent in ENTITY_TYPES:
+            n_terms = sizes[ent]
+            art_csr = _take_rows(*_concat_rows(store.by_article[ent], rows[ent]), order)
+            _save_csr(tmp, f'{ent}_art', *art_csr)
+            build_postings(tmp, ent, art_csr[0], art_csr[1], n_terms)
+            day_csr = _group_rows(*_concat_rows(store.by_day[ent], rows[ent]), row_days, len(days), n_terms)
+            _save_csr(tmp, f'{ent}_day', *day_csr)
+            # Les points de contrôle ne changent qu'à partir du premier jour touché par le lot
+            _save_prefix_sums(tmp, f'{ent}_cum', *day_csr, n_terms, store.cumulative[ent], int(new_days.min()))
+            # Pics recalculés sur la matrice mensuelle fusionnée (référence glissante modifiée par les nouveaux jours)
+            if ent in BURST_ENTITIES:
+                build_bursts(tmp, ent, *monthly_counts(days, day_num, *day_csr, n_terms))
+
+        segments = self._merged_segments(store, tmp, new_order, remaps, sizes)
+        segments_per_article = np.diff(segments['kws'][0])
+        np.save(os.path.join(tmp, 'day_segments.npy'),
+                (np.bincount(old_days, weights=store.day_segments, minlength=len(days))
+                 + np.bincount(new_days, weights=segments_per_article, minlength=len(days))).astype(np.int64))
+        n_segments = store.n_segments + int(segments_per_article.sum())
+        for ent in SEGMENT_ENTITIES:
+            art_ptr, seg_ptr, ids = segments[ent]
+            # Lignes jour x terme existantes + paragraphes des nouveaux articles, regroupées par jour
+            _save_csr(tmp, f'{ent}_segday', *_group_rows(
+                *_concat_rows(store.seg_by_day[ent], (seg_ptr, ids, np.ones(len(ids), dtype=np.int32))),
+                np.concatenate((old_days, np.repeat(new_days, np.diff(art_ptr)))), len(days), sizes[ent]))
+        for a_ent, b_ent in COOC_PAIRS:
+            # Blocs existants (jours ré-indexés) + paires des nouveaux articles, fusionnés par tranches de jours
+            shape, symmetric = (sizes[a_ent], sizes[b_ent]), a_ent == b_ent
+            new = pair_triplets(segments[a_ent], segments[b_ent], new_days, symmetric)
+            total = save_cooccurrence(tmp, f'cooc_{a_ent}_{b_ent}',
+                                      merged_blocks(store.cooccurrence(a_ent, b_ent), old_days, *new, len(days), shape),
+                                      len(days), shape, symmetric)
+            if a_ent == b_ent == 'kws':
+                build_neighbors(tmp, total, np.load(os.path.join(tmp, 'kws_segfreq.npy')), n_segments, totals['kws'])
+        return len(ordinals), len(days), n_segments
+
+
+def _version_dir(path):
+    # Dossier d'une nouvelle version du store, rendu visible en une fois par _commit
+    versions = path + '.versions'
+    os.makedirs(versions, exist_ok=True)
+    _prune_versions(path)
+    tmp = os.path.join(versions, uuid.uuid4().hex + '.tmp')
+    os.makedirs(tmp)
+    return tmp
+
+
+def _commit(tmp, path, manifest):
+    # Manifeste écrit en dernier, puis bascule du lien symbolique du store par un seul rename atomique :
+    # un lecteur voit toujours une version complète (l'ancienne ou la nouvelle), jamais un store absent
+    with open(os.path.join(tmp, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    version = tmp[:-len('.tmp')]
+    os.replace(tmp, version)
+    link = f'{version}.link'
+    os.symlink(os.path.relpath(version, os.path.dirname(path)), link)
+    if os.path.isdir(path) and not os.path.islink(path):
+        # Store d'un format antérieur (dossier) : remplacé une fois
+        shutil.rmtree(path)
+    previous = os.path.realpath(path)
+    os.replace(link, path)
+    _prune_versions(path, keep=previous)
+
+
+def _prune_versions(path, keep=None):
+    # Versions antérieures supprimées (les processus qui les ont ouvertes gardent leurs mmap, toutes les colonnes
+    # étant ouvertes à l'ouverture du store) ; keep (version précédente) reste pour un lecteur en cours d'ouverture.
+    # Dossiers et liens d'une écriture interrompue retirés après VERSION_TMP_TTL
+    current = os.path.realpath(path)
+    for entry in os.scandir(path + '.versions'):
+        if entry.is_symlink() or entry.name.endswith('.tmp'):
+            if entry.stat(follow_symlinks=False).st_mtime + VERSION_TMP_TTL < time.time():
+                if entry.is_symlink():
+                    os.remove(entry.path)
+                else:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        elif os.path.realpath(entry.path) not in (current, keep):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _concat_rows(a, b):
+    # Concaténation verticale de deux CSR (CSRColumn ou triplet indptr, indices, data)
+    if isinstance(a, CSRColumn):
+        a = (a.indptr, a.indices, a.data)
+    indptr = np.concatenate((a[0], a[0][-1] + b[0][1:])).astype(np.int64)
+    return indptr, np.concatenate((a[1], b[1])).astype(np.int32), np.concatenate((a[2], b[2])).astype(np.int32)
+
+
+def _ints(buffer):
+    # Vue NumPy (sans copie) d'un array('i') du builder
+    return np.frombuffer(buffer, dtype=np.int32)
+
+
+def _lengths_ptr(lengths):
+    # Longueurs -> pointeurs de début (indptr)
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(_ints(lengths), out=indptr[1:])
+    return indptr
+
+
+def _row_positions(indptr, rows):
+    # indptr des lignes données et positions de leurs éléments dans la CSR
+    lengths = np.diff(indptr)[rows]
+    out_ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=out_ptr[1:])
+    return out_ptr, np.repeat(indptr[rows] - out_ptr[:-1], lengths) + np.arange(out_ptr[-1])
+
+
+def _take_rows(indptr, indices, data, rows):
+    # Lignes d'une CSR dans l'ordre donné
+    out_ptr, positions = _row_positions(indptr, rows)
+    return out_ptr, indices[positions], data[positions]
+
+
+def _pad(values, n):
+    out = np.zeros(n, dtype=np.int64)
+    out[:len(values)] = values
+    return out
+
+
+def _group_rows(indptr, indices, data, row_group, n_groups, n_cols):
+    # Agrège les lignes d'une CSR par groupe (ici : articles -> jours)
+    rows = np.repeat(row_group, np.diff(indptr))
+    keys = rows.astype(np.int64) * n_cols + indices
+    uniq, inv = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inv, weights=data).astype(np.int32)
+    g_rows = (uniq // n_cols).astype(np.int64)
+    g_indptr = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(g_rows, minlength=n_groups), out=g_indptr[1:])
+    return g_indptr, (uniq % n_cols).astype(np.int32), sums
+
+
+class PrefixSums:
+    # Sommes cumulées aux seuls points de contrôle, écrites à la suite : ligne c = total des jours [0, c * CUM_STEP),
+    # lignes jour x terme reçues par blocs de jours consécutifs. Avec base (points d'un store existant), les points
+    # antérieurs au jour first sont recopiés tels quels
+    def __init__(self, path, name, n_days, n_cols, base=None, first=0):
+        self.n_rows, self.n_cols = n_days // CUM_STEP + 1, n_cols
+        self.f = open(os.path.join(path, f'{name}.npy'), 'wb')
+        np.lib.format.write_array_header_1_0(self.f, {'descr': np.lib.format.dtype_to_descr(np.dtype(np.int32)),
+                                                      'fortran_order': False, 'shape': (self.n_rows, n_cols)})
+        self.running = np.zeros(n_cols, dtype=np.int64)
+        self._write_row()
+        keep = first // CUM_STEP + 1 if base is not None else 1
+        for r in range(1, keep):
+            self.running = _pad(base[r], n_cols)
+            self._write_row()
+        self.written = keep
+        # Jours déjà sommés dans running, premier jour du prochain bloc
+        self.day = (keep - 1) * CUM_STEP
+        self.next = 0
+
+    def _write_row(self):
+        self.f.write(self.running.astype(np.int32).tobytes())
+
+    def write(self, indptr, indices, data):
+        first, n = self.next, len(indptr) - 1
+        self.next += n
+        while self.written < self.n_rows:
+            end = self.written * CUM_STEP
+            stop = min(end, first + n)
+            if stop > self.day:
+                lo, hi = indptr[self.day - first], indptr[stop - first]
+                self.running += np.bincount(indices[lo:hi], weights=data[lo:hi], minlength=self.n_cols).astype(np.int64)
+                self.day = stop
+            if stop < end:
+                break
+            self._write_row()
+            self.written += 1
+
+    def close(self):
+        self.f.close()
+        if self.written != self.n_rows:
+            raise ValueError(f"points de contrôle incomplets : {self.f.name}")
+
+
+def _save_prefix_sums(path, name, indptr, indices, data, n_cols, base=None, first=0):
+    cumulative = PrefixSums(path, name, len(indptr) - 1, n_cols, base, first)
+    cumulative.write(indptr, indices, data)
+    cumulative.close()
+
+
+def _save_csr(path, name, indptr, indices, data):
+    np.save(os.path.join(path, f'{name}_indptr.npy'), indptr)
+    np.save(os.path.join(path, f'{name}_indices.npy'), indices)
+    np.save(os.path.join(path, f'{name}_data.npy'), data)
+
+
+def _write_strings(path, name, strings):
+    _write_bytes(path, name, [[s.encode('utf-8') for s in strings]])
+
+
+def _write_bytes(path, name, chunks):
+    # Chaînes encodées reçues par listes successives : octets à la suite, décalages de début écrits au fil de l'eau
+    offsets = ColumnWriter(os.path.join(path, f'{name}_offsets.npy'), np.int64)
+    offsets.write([0])
+    end = 0
+    with open(os.path.join(path, f'{name}.bin'), 'wb') as f:
+        for encoded in chunks:
+            f.write(b''.join(encoded))
+            ends = end + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+            offsets.write(ends)
+            end = int(ends[-1]) if len(ends) else end
+    offsets.close()
+
+
+def _extend_strings(old_path, path, name, encoded):
+    # Chaînes ajoutées à la suite d'une colonne existante : octets copiés puis prolongés, décalages poursuivis
+    shutil.copyfile(os.path.join(old_path, f'{name}.bin'), os.path.join(path, f'{name}.bin'))
+    with open(os.path.join(path, f'{name}.bin'), 'ab') as f:
+        f.write(b''.join(encoded))
+    offsets = np.load(os.path.join(old_path, f'{name}_offsets.npy'), mmap_mode='r')
+    extend_column(old_path, path, f'{name}_offsets', len(offsets),
+                  int(offsets[-1]) + np.cumsum([len(b) for b in encoded], dtype=np.int64))
+
+
+# Lecture du store (memory-mapped)
+class StringColumn:
+    def __init__(self, path, name):
+        self.offsets = np.load(os.path.join(path, f'{name}_offsets.npy'), mmap_mode='r')
+        size = os.path.getsize(os.path.join(path, f'{name}.bin'))
+        self.blob = np.memmap(os.path.join(path, f'{name}.bin'), dtype=np.uint8, mode='r') if size else np.zeros(0, np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+
+class CSRColumn:
+    def __init__(self, path, name, n_cols):
+        self.indptr = np.load(os.path.join(path, f'{name}_indptr.npy'), mmap_mode='r')
+        self.indices = np.load(os.path.join(path, f'{name}_indices.npy'), mmap_mode='r')
+        self.data = np.load(os.path.join(path, f'{name}_data.npy'), mmap_mode='r')
+        self.n_cols = n_cols
+
+    def sum_rows(self, start=0, end=None):
+        end = len(self.indptr) - 1 if end is None else end
+        lo, hi = self.indptr[start], self.indptr[end]
+        return np.bincount(self.indices[lo:hi], weights=self.data[lo:hi], minlength=self.n_cols).astype(np.int64)
+
+    def rows(self, start, end):
+        # Lignes [start, end) en triplet CSR (indptr ramené à 0)
+        lo, hi = int(self.indptr[start]), int(self.indptr[end])
+        return np.asarray(self.indptr[start:end + 1]) - lo, self.indices[lo:hi], self.data[lo:hi]
+
+
+class CorpusStore:
+    def __init__(self, path):
+        # path est un lien vers le dossier de la version courante : la version est résolue une fois, et toutes les
+        # colonnes sont ouvertes ici, si bien qu'un store ouvert reste cohérent quand le lien bascule
+        self.store_path = path
+        self.path = path = os.path.realpath(path)
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.days = self._load('days')
+        self.day_num = self._load('day_num')
+        self.article_day = self._load('article_day')
+        self.article_ts = self._load('article_ts')
+        self.urls = StringColumn(path, 'article_url')
+        self.titles = StringColumn(path, 'article_title')
+        self.vocab, self.term_ids, self.totals, self.by_day, self.by_article = {}, {}, {}, {}, {}
+        self.postings = {}
+        self._search_terms = None
+        self.cumulative, self.seg_totals, self.seg_by_day = {}, {}, {}
+        self.day_segments = self._load('day_segments')
+        self._series = None
+        for ent in ENTITY_TYPES:
+            with open(os.path.join(path, f'vocab_{ent}.json'), 'r', encoding='utf-8') as f:
+                self.vocab[ent] = json.load(f)
+            self.term_ids[ent] = {t: i for i, t in enumerate(self.vocab[ent])}
+            self.totals[ent] = self._load(f'{ent}_all')
+            self.by_day[ent] = CSRColumn(path, f'{ent}_day', len(self.vocab[ent]))
+            self.cumulative[ent] = self._load(f'{ent}_cum')
+            self.by_article[ent] = CSRColumn(path, f'{ent}_art', len(self.vocab[ent]))
+            self.postings[ent] = PostingIndex(path, ent)
+        self.bursts = {ent: Bursts.load(path, ent, len(self.vocab[ent])) for ent in BURST_ENTITIES}
+        for ent in SEGMENT_ENTITIES:
+            self.seg_totals[ent] = self._load(f'{ent}_segfreq')
+            self.seg_by_day[ent] = CSRColumn(path, f'{ent}_segday', len(self.vocab[ent]))
+        self._cooc = {(a, b): CooccurrenceIndex(path, f'cooc_{a}_{b}', (len(self.vocab[a]), len(self.vocab[b])), a == b)
+                      for a, b in COOC_PAIRS}
+        self._neighbor_rows = {int(i): row for row, i in enumerate(self._load('kws_nbr_terms'))}
+        self._neighbors = {w: (self._load(f'kws_nbr_{w}_ids'), self._load(f'kws_nbr_{w}_scores')) for w in NETWORK_WEIGHTS}
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+
+    def is_stale(self):
+        # Le store a été ré-écrit (ajout de jours ou reconstruction) depuis son ouverture
+        return os.path.lexists(self.store_path) and os.path.realpath(self.store_path) != self.path
+
+    @property
+    def version(self):
+        return self.manifest.get('build_id'), self.manifest.get('version', 1)
+
+    def changed_since(self, start=None, end=None):
+        # Dernière version ayant modifié des jours de l'intervalle (0 = intervalle inchangé depuis la construction)
+        touched = [c['version'] for c in self.manifest.get('changes', [])
+                   if (end is None or c['first_day'] <= end.isoformat()) and (start is None or c['last_day'] >= start.isoformat())]
+        return max(touched, default=0)
+
+    @property
+    def n_articles(self):
+        return self.manifest['n_articles']
+
+    def day_range(self, start=None, end=None):
+        # Indices [lo, hi) des jours compris entre deux dates (incluses)
+        lo = 0 if start is None else int(np.searchsorted(self.days, start.toordinal(), 'left'))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, end.toordinal(), 'right'))
+        return lo, hi
+
+    def article_range(self, start=None, end=None):
+        # Lignes [lo, hi) des articles publiés entre deux dates (articles triés par date)
+        lo, hi = self.day_range(start, end)
+        offsets = self.series.cumsum
+        return int(offsets[lo]), int(offsets[max(hi, lo)])
+
+    @property
+    def search_terms(self):
+        # Formes en minuscules de tous les termes, construites à la première recherche
+        if self._search_terms is None:
+            self._search_terms = term_lookup(self)
+        return self._search_terms
+
+    def article(self, row):
+        return {'url': self.urls[row], 'title': self.titles[row], 'timestamp': int(self.article_ts[row]),
+                'date': date.fromordinal(int(self.days[self.article_day[row]]))}
+
+    def is_full_range(self, start=None, end=None):
+        return self.day_range(start, end) == (0, len(self.days))
+
+    def counts(self, ent, start=None, end=None):
+        # Comptes par terme sur un intervalle : différence de deux totaux depuis le premier jour
+        if self.is_full_range(start, end):
+            return np.asarray(self.totals[ent])
+        lo, hi = self.day_range(start, end)
+        if hi <= lo:
+            return np.zeros(len(self.vocab[ent]), dtype=np.int64)
+        if lo // CUM_STEP == hi // CUM_STEP:
+            return self.by_day[ent].sum_rows(lo, hi)
+        return self._prefix(ent, hi) - self._prefix(ent, lo)
+
+    def _prefix(self, ent, day):
+        # Total des jours [0, day) : point de contrôle précédent + moins de CUM_STEP lignes quotidiennes
+        c = day // CUM_STEP
+        return self.cumulative[ent][c].astype(np.int64) + self.by_day[ent].sum_rows(c * CUM_STEP, day)
+
+    def top(self, ent, n, start=None, end=None):
+        # Top-N par sélection partielle (argpartition) puis tri des seuls N retenus
+        counts = self.counts(ent, start, end)
+        ids = top_n(counts, n)
+        return [self.vocab[ent][i] for i in ids], counts[ids]
+
+    def cooccurrence(self, a_ent, b_ent):
+        return self._cooc[(a_ent, b_ent)]
+
+    @property
+    def series(self):
+        # Série quotidienne d'articles (tableaux NumPy, sommes cumulées pour les totaux par intervalle)
+        if self._series is None:
+            self._series = DailySeries.from_store(self)
+        return self._series
+
+    @property
+    def n_segments(self):
+        return self.manifest['n_segments']
+
+    def seg_freq(self, ent, start=None, end=None):
+        if self.is_full_range(start, end):
+            return self.seg_totals[ent]
+        return self.seg_by_day[ent].sum_rows(*self.day_range(start, end))
+
+    def segments_in(self, start=None, end=None):
+        lo, hi = self.day_range(start, end)
+        return int(np.sum(self.day_segments[lo:hi]))
+
+    def neighbor_lists(self, weight):
+        # ({id de mot-clé: ligne}, voisins, scores) des listes pré-calculées
+        return (self._neighbor_rows,) + self._neighbors[weight]
+
+    def as_dict(self, ent, start=None, end=None):
+        counts = self.counts(ent, start, end)
+        vocab = self.vocab[ent]
+        return {vocab[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+
+# Ingestion
+def store_path_for(json_path):
+    name = os.path.splitext(os.path.basename(json_path))[0]
+    return os.path.join(STORE_DIR, name)
+
+
+def _source_stamp(json_path):
+    st = os.stat(json_path)
+    return {'source': os.path.basename(json_path), 'source_size': st.st_size, 'source_mtime': int(st.st_mtime)}
+
+
+def is_fresh(json_path, store_path):
+    try:
+        with open(os.path.join(store_path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    stamp = _source_stamp(json_path)
+    return manifest.get('format') == STORE_FORMAT and all(manifest.get(k) == v for k, v in stamp.items())
+
+
+def batch_dir_for(store_path):
+    return store_path + '.batches'
+
+
+def _add_batches(builder, batch_paths, seen):
+    # Articles des lots, sans doublon d'URL (un jour re-collecté ou déjà présent dans le JSON)
+    for batch_path in batch_paths:
+        for day, article in iter_batch(batch_path):
+            url = article.get('url', '')
+            if url and url in seen:
+                continue
+            seen.add(url)
+            builder.add(day, article)
+
+
+def _stored_batches(store_path):
+    batch_dir = batch_dir_for(store_path)
+    if not os.path.isdir(batch_dir):
+        return []
+    return sorted(os.path.join(batch_dir, f) for f in os.listdir(batch_dir) if f.endswith('.jsonl'))
+
+
+def _file_digest(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _keep_batch(store_path, batch_path):
+    # Copie du lot sous un nom unique « <rang>-<sha1 du contenu>.jsonl » (ordre d'ajout conservé au rejeu) ;
+    # un lot au contenu déjà conservé n'est pas recopié
+    batch_dir = batch_dir_for(store_path)
+    os.makedirs(batch_dir, exist_ok=True)
+    digest = _file_digest(batch_path)
+    stored = _stored_batches(store_path)
+    for path in stored:
+        if os.path.basename(path).endswith(f'-{digest}.jsonl'):
+            return path
+    target = os.path.join(batch_dir, f'{len(stored) + 1:06d}-{digest}.jsonl')
+    tmp = target + '.tmp'
+    shutil.copyfile(batch_path, tmp)
+    os.replace(tmp, target)
+    return target
+
+
+def build_part(json_path, part=None):
+    builder = StoreBuilder()
+    try:
+        for day, article in iter_articles(json_path, part):
+            builder.add(day, article)
+    except BaseException:
+        builder.close()
+        raise
+    return builder
+
+
+def _finish(json_path, store_path, builder):
+    # Lots déjà ajoutés rejoués, puis écriture du store ; colonnes temporaires du builder supprimées dans tous les cas
+    store_path = store_path or store_path_for(json_path)
+    try:
+        batches = _stored_batches(store_path)
+        if batches:
+            _add_batches(builder, batches, set(builder.urls))
+        builder.write(store_path, _source_stamp(json_path))
+    finally:
+        builder.close()
+    return store_path
+
+
+def ingest(json_path, store_path=None, workers=1):
+    # Reconstruction complète : JSON source lu en flux (mois répartis sur workers processus), puis lots déjà ajoutés
+    if workers <= 1:
+        return _finish(json_path, store_path, build_part(json_path))
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(build_part, [json_path] * workers, [(k, workers) for k in range(workers)]))
+    return _finish(json_path, store_path, _merge_parts(parts))
+
+
+def ingest_all(json_paths, workers=INGEST_WORKERS):
+    # Plusieurs corpus : toutes les parties (fichier, mois) partagent un même pool
+    if workers <= 1:
+        return [ingest(json_path) for json_path in json_paths]
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [[pool.submit(build_part, json_path, (k, workers)) for k in range(workers)] for json_path in json_paths]
+        return [_finish(json_path, None, _merge_parts([f.result() for f in parts]))
+                for json_path, parts in zip(json_paths, futures)]
+
+
+def _merge_parts(parts):
+    builder = parts[0]
+    try:
+        for part in parts[1:]:
+            builder.merge(part)
+    except BaseException:
+        builder.close()
+        raise
+    finally:
+        for part in parts[1:]:
+            part.close()
+    return builder
+
+
+def append(json_path, batch_paths, store_path=None):
+    # Ajout incrémental de lots JSONL ; les lots sont conservés pour être rejoués après une reconstruction
+    store_path = store_path or store_path_for(json_path)
+    if not is_fresh(json_path, store_path):
+        ingest(json_path, store_path)
+    store = CorpusStore(store_path)
+    builder = StoreBuilder()
+    try:
+        _add_batches(builder, batch_paths, {store.urls[i] for i in range(store.n_articles)})
+        if builder.n_articles:
+            builder.extend(store, store_path)
+    finally:
+        builder.close()
+    # Lots conservés seulement une fois la nouvelle version en place : un ajout en échec ne laisse aucun lot à rejouer
+    for batch_path in batch_paths:
+        _keep_batch(store_path, batch_path)
+    return builder.n_articles
+
+
+def open_store(json_path, store_path=None):
+    # Ingestion unique si le store est absent ou périmé, puis ouverture en mmap
+    store_path = store_path or store_path_for(json_path)
+    if not is_fresh(json_path, store_path):
+        ingest(json_path, store_path)
+    return CorpusStore(store_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convertit les corpus JSON Sputnik en stores colonnes (mmap)")
+    parser.add_argument('files', nargs='*', help="Fichiers JSON (défaut : tous les corpus du dossier data)")
+    parser.add_argument('--force', action='store_true', help="Reconstruire même si le store est à jour")
+    parser.add_argument('--append', nargs='+', metavar='JSONL', help="Lots JSONL de nouveaux articles à ajouter au corpus")
+    parser.add_argument('--workers', type=int, default=INGEST_WORKERS, help="Processus d'ingestion (fichiers et mois en parallèle)")
+    args = parser.parse_args()
+    if args.append:
+        if len(args.files) != 1:
+            parser.error("--append attend exactement un fichier JSON de corpus")
+        print(f"{append(args.files[0], args.append)} article(s) ajouté(s) à {store_path_for(args.files[0])}")
+        raise SystemExit
+    files = args.files or sorted(os.path.join(DATA_DIR, f) for f in os.listdir(DATA_DIR)
+                                 if f.startswith('fr.sputniknews.africa-') and f.endswith('.json'))
+    stale = [json_path for json_path in files if args.force or not is_fresh(json_path, store_path_for(json_path))]
+    for json_path in files:
+        if json_path not in stale:
+            print(f"À jour : {store_path_for(json_path)}")
+    for json_path, store_path in zip(stale, ingest_all(stale, args.workers)):
+        print(f"Ingestion {json_path} -> {store_path}")
@@ -1,14 +1,21 @@
 
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State, Patch, ctx
+from dash.exceptions import MissingCallbackContextException
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import pandas as pd
 import numpy as np
-import json
-from datetime import datetime, timedelta
-from collections import Counter
-import networkx as nx
+from datetime import date, timedelta
+
+from corpus_registry import CorpusRegistry
+from cache import cached
+from metrics import install as install_metrics, span, timed
+from timeseries import period_range
+from keyword_network import StoreNeighbors, ego_network, merged_neighbors, radial_layout
+from search_index import SEARCH_LIMIT, parse_query, search
+from bursts import BURST_ENTITIES, burst_days, month_label, month_of
 
 # Configuration couleurs
 COLORS = {
@@ -19,102 +26,228 @@ COLORS = {
     'text': '#0f172a', 'text_secondary': '#334155',
 }
 
-# Charger données
-def load_data():
-    with open('fr.sputniknews.africa-2025/data/fr.sputniknews.africa-france-macron.json', 'r', encoding='utf-8') as f:
-        data_macron = json.load(f)
-    with open('fr.sputniknews.africa-2025/data/fr.sputniknews.africa-russie-poutine.json', 'r', encoding='utf-8') as f:
-        data_poutine = json.load(f)
-    return data_macron, data_poutine
+EXTRA_CORPUS_COLORS = ['#10b981', '#f59e0b', '#ec4899', '#14b8a6', '#6366f1', '#84cc16', '#f97316', '#64748b']
+CORPUS_EMOJIS = {'macron': '🔴', 'poutine': '🔵'}
+
+NETWORK_NODE_SIZES = (50, 30, 20, 15)
+# Heatmap des pics d'attention : nombre de termes émergents affichés, tous types confondus
+ATTENTION_PEAK_TERMS = 12
+ENTITY_NAMES = {'kws': 'mot-clé', 'per': 'personne', 'loc': 'lieu', 'org': 'organisation'}
+
+# Template allégé, envoyé avec chaque figure : seules les clés de plotly_white utiles aux graphiques du dashboard
+FIGURE_TEMPLATE_KEYS = ('autotypenumbers', 'colorway', 'font', 'hovermode', 'hoverlabel', 'paper_bgcolor', 'plot_bgcolor',
+                        'title', 'xaxis', 'yaxis')
+pio.templates['sputnik'] = go.layout.Template(
+    layout={key: value for key, value in pio.templates['plotly_white'].layout.to_plotly_json().items() if key in FIGURE_TEMPLATE_KEYS},
+    data={'bar': [go.Bar(marker_line=dict(color='white', width=0.5))],
+          'heatmap': [go.Heatmap(colorbar=dict(outlinewidth=0, ticks=''))]})
+pio.templates.default = 'sputnik'
+
+# Registre des corpus : découverte des fichiers, chargement paresseux des stores
+registry = CorpusRegistry()
+
+def corpus_key(corpus_name):
+    return corpus_name.split('/')[0].lower()
+
+def corpus_color(corpus_name):
+    if corpus_name == 'Combined':
+        return COLORS['combined']
+    if corpus_key(corpus_name) in COLORS:
+        return COLORS[corpus_key(corpus_name)]
+    names = list(registry.sources)
+    index = names.index(corpus_name) if corpus_name in names else 0
+    return EXTRA_CORPUS_COLORS[index % len(EXTRA_CORPUS_COLORS)]
+
+def corpus_emoji(corpus_name):
+    return '🟣' if corpus_name == 'Combined' else CORPUS_EMOJIS.get(corpus_key(corpus_name), '⚪')
+
+def get_selected_names(corpus_selected):
+    # 'Combined' = tous les corpus disponibles, sinon le corpus demandé
+    return None if corpus_selected == 'Combined' else [corpus_selected]
 
-data_macron, data_poutine = load_data()
+def get_selected_stores(corpus_selected):
+    return registry.stores(get_selected_names(corpus_selected))
 
 # Fonctions utilitaires
-def get_combined_data():
-    return {
-        'kws': Counter(data_macron['metadata']['all']['kws']) + Counter(data_poutine['metadata']['all']['kws']),
-        'loc': Counter(data_macron['metadata']['all']['loc']) + Counter(data_poutine['metadata']['all']['loc']),
-        'org': Counter(data_macron['metadata']['all']['org']) + Counter(data_poutine['metadata']['all']['org']),
-        'per': Counter(data_macron['metadata']['all']['per']) + Counter(data_poutine['metadata']['all']['per']),
-    }
+def parse_date(value):
+    # Dates du DatePickerRange ('YYYY-MM-DD' ou 'YYYY-MM-DDTHH:MM:SS'), None = non borné
+    return date.fromisoformat(value[:10]) if value else None
 
-def get_data_by_corpus(corpus_selected):
-    if corpus_selected == 'Macron/France':
-        return data_macron['metadata']['all']
-    elif corpus_selected == 'Poutine/Russie':
-        return data_poutine['metadata']['all']
-    else:
-        return get_combined_data()
+@timed('fetch')
+def get_top_entities(corpus_selected, entity_type='kws', n=20, start=None, end=None):
+    # Top-N sur l'intervalle par sélection partielle sur les vecteurs de comptes (vocabulaire interné)
+    terms, counts = registry.top(get_selected_names(corpus_selected), entity_type, n, start, end)
+    return pd.DataFrame({'entity': terms, 'count': counts})
+
+@timed('fetch')
+def get_cooccurrence(corpus_selected, a_ent, a_terms, b_ent, b_terms, start=None, end=None):
+    # Co-occurrences réelles (même paragraphe d'article) lues dans l'index, sommées sur les corpus sélectionnés
+    matrix = np.zeros((len(a_terms), len(b_terms)), dtype=np.int64)
+    for _, store in get_selected_stores(corpus_selected):
+        ids_a, ids_b = store.term_ids[a_ent], store.term_ids[b_ent]
+        rows = [i for i, term in enumerate(a_terms) if term in ids_a]
+        cols = [j for j, term in enumerate(b_terms) if term in ids_b]
+        if rows and cols:
+            matrix[np.ix_(rows, cols)] += store.cooccurrence(a_ent, b_ent).submatrix(
+                [ids_a[a_terms[i]] for i in rows], [ids_b[b_terms[j]] for j in cols], *store.day_range(start, end))
+    return matrix
+
+def data_stamp(corpus_selected, start_date=None, end_date=None, *filters):
+    # Version des données d'un callback (corpus, début, fin, ...) : invalidée seulement par un ajout sur l'intervalle
+    return registry.data_version(get_selected_names(corpus_selected), parse_date(start_date), parse_date(end_date))
+
+def attention_peaks_stamp(corpus_selected, start_date=None, end_date=None):
+    # Scores d'un mois relus sur le mois entier et ses mois de référence : empreinte étendue à ces jours
+    return registry.data_version(get_selected_names(corpus_selected), *burst_days(parse_date(start_date), parse_date(end_date)))
+
+def ego_network_stamp(corpus_selected, selected_word, depth, start=None, end=None):
+    return registry.data_version(get_selected_names(corpus_selected), start, end)
+
+@cached('ego-network', ego_network_stamp)
+def get_ego_network(corpus_selected, selected_word, depth, start=None, end=None):
+    # Réseau ego (voisins par co-occurrence) et disposition radiale, mis en cache par mot et intervalle
+    with span('fetch'):
+        stores = get_selected_stores(corpus_selected)
+        # Plusieurs corpus : voisins ramenés au vocabulaire global avant fusion
+        sources = [StoreNeighbors(store, start, end, registry.remap(name, store, 'kws') if len(stores) > 1 else None)
+                   for name, store in stores]
+    with span('aggregate'):
+        terms = registry.vocabularies['kws'].terms
+        nodes, edges = ego_network(lambda word, m: merged_neighbors(sources, word, m, terms=terms), selected_word, depth)
+    with span('layout'):
+        return nodes, edges, radial_layout(nodes)
 
-def get_top_entities(data, entity_type='kws', n=20):
-    if isinstance(data, dict) and entity_type in data:
-        entities = data[entity_type]
+def get_period_bounds(corpus_selected, period):
+    # (début, fin) d'un filtre prédéfini ; 'Toute la période' = premier et dernier jour publiés
+    series = [store.series for _, store in get_selected_stores(corpus_selected) if store.series.last_day]
+    if not series:
+        return None, None
+    first_day, last_day = min(s.first_day for s in series), max(s.last_day for s in series)
+    start, end = period_range(period, last_day)
+    return start or first_day, end or last_day
+
+@timed('aggregate')
+def get_temporal_data(corpus_selected, start=None, end=None, freq='M'):
+    # Série quotidienne pré-calculée de chaque corpus, ré-échantillonnée (jour / semaine / mois)
+    frames = []
+    for corpus_name, store in get_selected_stores(corpus_selected):
+        dates, counts = store.series.resample(freq, start, end)
+        frames.append(pd.DataFrame({'date': dates.astype('datetime64[ns]'), 'n_articles': counts, 'corpus': corpus_name}))
+    if not frames:
+        return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'n_articles': pd.Series(dtype='int64'), 'corpus': pd.Series(dtype='object')})
+    return pd.concat(frames, ignore_index=True)
+
+@timed('aggregate')
+def get_attention_peaks(corpus_selected, start=None, end=None, n=ATTENTION_PEAK_TERMS):
+    # Termes aux pics (score z) les plus forts sur les mois de l'intervalle, tous types d'entité confondus, puis score
+    # de chacun sur chaque mois ; un mois partiellement couvert par l'intervalle est compté en entier
+    names = get_selected_names(corpus_selected)
+    lo = month_of(start) if start else 0
+    hi = month_of(end) if end else month_of(date.max)
+    peaks, sources = [], {}
+    for ent in BURST_ENTITIES:
+        sources[ent] = registry.bursts(names, ent)
+        peaks += [(z, month, ent, term) for term, z, month in sources[ent][0].top_terms(lo, hi, n)]
+    # Lignes dans l'ordre d'apparition des pics
+    peaks = sorted(sorted(peaks, key=lambda p: (-p[0], p[2], p[3]))[:n], key=lambda p: (p[1], -p[0]))
+    months, columns = [], {}
+    for ent in BURST_ENTITIES:
+        ids = [term for _, _, e, term in peaks if e == ent]
+        if ids:
+            months, counts, z = sources[ent][0].scores(ids, lo, hi)
+            columns.update({(ent, i): (counts[:, k], z[:, k]) for k, i in enumerate(ids)})
+    # (type d'entité, terme, mentions par mois, scores z par mois)
+    rows = [(ent, sources[ent][1][term]) + columns[(ent, term)] for _, _, ent, term in peaks]
+    return [month_label(m) for m in months], rows
+
+@timed('fetch')
+def get_articles(corpus_selected, clauses, start=None, end=None, limit=SEARCH_LIMIT):
+    # Articles correspondant à toutes les clauses (index inversé), les plus récents d'abord
+    total, found = 0, []
+    for corpus_name, store in get_selected_stores(corpus_selected):
+        rows = search(store, clauses, start, end)
+        total += len(rows)
+        found += [dict(store.article(int(row)), corpus=corpus_name) for row in rows[::-1][:limit]]
+    found.sort(key=lambda article: (article['date'], article['timestamp']), reverse=True)
+    return total, found[:limit]
+
+def period_bounds(value, freq):
+    # Période (jour, semaine du lundi, mois) commençant à la date cliquée
+    start = parse_date(value)
+    if freq == 'W':
+        return start, start + timedelta(days=6)
+    if freq == 'M':
+        return start, date(start.year + start.month // 12, start.month % 12 + 1, 1) - timedelta(days=1)
+    return start, start
+
+def drilldown_query(graph_id, point, freq='M'):
+    # Clic sur une barre, une cellule ou un noeud -> requête {libellé, clauses, début, fin} (None si non exploitable)
+    start = end = None
+    if graph_id == 'viz-top-keywords':
+        label, clauses = point['y'], [('kws', point['y'])]
+    elif graph_id == 'viz-geography':
+        label, clauses = point['y'], [('loc', point['y'])]
+    elif graph_id == 'viz-actors-locations':
+        label, clauses = f"{point['y']} × {point['x']}", [('per', point['y']), ('loc', point['x'])]
+    elif graph_id == 'viz-word-network':
+        if not point.get('text'):
+            return None
+        label, clauses = point['text'], [('kws', point['text'])]
+    elif graph_id == 'viz-attention-peaks':
+        # Cellule (terme, mois) : type d'entité, terme exact et mois portés par customdata
+        if not point.get('customdata'):
+            return None
+        ent, term, month = point['customdata']
+        start, end = period_bounds(f"{month}-01", 'M')
+        label, clauses = f"{term} ({month})", [(ent, term)]
+    elif graph_id == 'viz-temporal':
+        start, end = period_bounds(point['x'], freq)
+        label, clauses = f"Articles du {start.strftime('%d/%m/%Y')} au {end.strftime('%d/%m/%Y')}", []
+    elif graph_id == 'viz-correlation':
+        labels = [point['source']['label'], point['target']['label']] if 'source' in point else [point.get('label')]
+        if not all(labels):
+            return None
+        label, clauses = ' × '.join(labels), [(None, term.lower()) for term in labels]
     else:
-        entities = data
-    top_entities = sorted(entities.items(), key=lambda x: x[1], reverse=True)[:n]
-    return pd.DataFrame(top_entities, columns=['entity', 'count'])
-
-def get_temporal_data(corpus_selected):
-    records = []
-    if corpus_selected in ['Macron/France', 'Combined']:
-        for year in data_macron['data'].keys():
-            for month in data_macron['data'][year].keys():
-                days = data_macron['data'][year][month]
-                n_articles = len(days) if isinstance(days, dict) else 0
-                records.append({
-                    'date': pd.to_datetime(f"{year}-{month.zfill(2)}-01"),
-                    'year': year, 'month': month, 'n_articles': n_articles, 'corpus': 'Macron/France'
-                })
-    if corpus_selected in ['Poutine/Russie', 'Combined']:
-        for year in data_poutine['data'].keys():
-            for month in data_poutine['data'][year].keys():
-                days = data_poutine['data'][year][month]
-                n_articles = len(days) if isinstance(days, dict) else 0
-                records.append({
-                    'date': pd.to_datetime(f"{year}-{month.zfill(2)}-01"),
-                    'year': year, 'month': month, 'n_articles': n_articles, 'corpus': 'Poutine/Russie'
-                })
-    df = pd.DataFrame(records)
-    # Trier par date pour éviter les lignes qui reviennent en arrière
-    if len(df) > 0:
-        df = df.sort_values('date').reset_index(drop=True)
-    return df
-
-def calculate_kpis(corpus_selected, period='all'):
-    df_temporal = get_temporal_data(corpus_selected)
-    if period == '2024':
-        df_temporal = df_temporal[df_temporal['year'] == '2024']
-    elif period == '2025':
-        df_temporal = df_temporal[df_temporal['year'] == '2025']
-    elif period == 'last6':
-        cutoff = df_temporal['date'].max() - timedelta(days=180)
-        df_temporal = df_temporal[df_temporal['date'] >= cutoff]
+        return None
+    return {'label': label, 'clauses': [list(clause) for clause in clauses],
+            'start': start.isoformat() if start else None, 'end': end.isoformat() if end else None}
+
+@timed('fetch')
+def calculate_kpis(corpus_selected, start=None, end=None):
+    stores = get_selected_stores(corpus_selected)
     
-    total_articles = df_temporal['n_articles'].sum()
-    if len(df_temporal) > 0:
-        date_min, date_max = df_temporal['date'].min(), df_temporal['date'].max()
+    total_articles = sum(store.series.total(start, end) for _, store in stores)
+    spans = [span for span in (store.series.span(start, end) for _, store in stores) if span[0] is not None]
+    if spans:
+        date_min, date_max = min(span[0] for span in spans), max(span[1] for span in spans)
         n_months = ((date_max.year - date_min.year) * 12 + date_max.month - date_min.month) + 1
         period_text = f"{n_months} mois"
     else:
         period_text = "0 mois"
     
-    data = get_data_by_corpus(corpus_selected)
     return {
         'total_articles': total_articles, 'period': period_text,
-        'total_kws': len(data['kws']), 'total_loc': len(data['loc']),
+        'total_kws': registry.distinct(get_selected_names(corpus_selected), 'kws', start, end),
+        'total_loc': registry.distinct(get_selected_names(corpus_selected), 'loc', start, end),
     }
 
 # App Dash
-app = dash.Dash(__name__, suppress_callback_exceptions=True,
+# Réponses compressées (gzip) : figures et JSON des callbacks
+app = dash.Dash(__name__, suppress_callback_exceptions=True, compress=True,
                 meta_tags=[{'name': 'viewport', 'content': 'width=device-width, initial-scale=1'}],
                 external_stylesheets=['https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap'])
 app.title = "Sputnik News Africa - Dashboard"
+# Application WSGI (gunicorn) ; voir wsgi.create_app pour le préchargement des corpus
+server = app.server
+# Mesures de latence et endpoint /metrics (SPUTNIK_METRICS=1), profileur (SPUTNIK_PROFILE_DIR)
+install_metrics(server)
 
 # Layout
 app.layout = html.Div([
     html.Div([
         html.H1(" Sputnik News Africa - Analyse de Corpus Médiatiques"),
-        html.P("Analyse approfondie des publications sur Macron/France et Poutine/Russie (2024-2025)")
+        html.P(f"Analyse approfondie des publications sur {' et '.join(registry.names())} (2024-2025)")
     ], className='dashboard-header'),
     
     html.Div(id='kpi-container', className='kpi-container'),
@@ -125,11 +258,9 @@ app.layout = html.Div([
             html.Div([
                 html.Label("Sélectionner le corpus", style={'color': COLORS['text'], 'fontWeight': '600', 'marginBottom': '0.5rem'}),
                 dcc.Dropdown(id='corpus-filter',
-                    options=[
-                        {'label': '🔴 Corpus Macron/France', 'value': 'Macron/France'},
-                        {'label': '🔵 Corpus Poutine/Russie', 'value': 'Poutine/Russie'},
-                        {'label': '🟣 Analyse Combinée', 'value': 'Combined'}
-                    ], value='Combined', clearable=False),
+                    options=[{'label': f"{corpus_emoji(name)} Corpus {name}", 'value': name} for name in registry.names()]
+                        + [{'label': '🟣 Analyse Combinée', 'value': 'Combined'}],
+                    value='Combined', clearable=False),
             ]),
             html.Div([
                 html.Label("Période temporelle", style={'color': COLORS['text'], 'fontWeight': '600', 'marginBottom': '0.5rem'}),
@@ -141,6 +272,11 @@ app.layout = html.Div([
                         {'label': ' 6 derniers mois', 'value': 'last6'},
                     ], value='all', clearable=False),
             ]),
+            html.Div([
+                html.Label("Intervalle de dates", style={'color': COLORS['text'], 'fontWeight': '600', 'marginBottom': '0.5rem'}),
+                dcc.DatePickerRange(id='date-range', display_format='DD/MM/YYYY', first_day_of_week=1,
+                    start_date_placeholder_text="Début", end_date_placeholder_text="Fin"),
+            ]),
             html.Div([
                 html.Label("Nombre d'éléments", style={'color': COLORS['text'], 'fontWeight': '600', 'marginBottom': '0.5rem'}),
                 dcc.Slider(id='top-n-slider', min=10, max=50, step=5, value=20,
@@ -150,6 +286,16 @@ app.layout = html.Div([
         ], className='filters-grid'),
     ], className='filters-container'),
     
+    html.Div([
+        html.H2(" Recherche d'Articles", style={'color': COLORS['text'], 'marginBottom': '1.5rem', 'fontSize': '1.75rem', 'fontWeight': '700'}),
+        html.Div([
+            dcc.Input(id='search-input', type='search', debounce=True, className='search-input',
+                placeholder="Mots-clés, personnes, lieux… (virgule entre deux expressions), ou cliquez sur une barre, une cellule ou un noeud"),
+            dcc.Store(id='search-query'),
+            html.Div(id='search-results', className='search-results'),
+        ], className='viz-card'),
+    ], style={'marginBottom': '3rem'}),
+    
     html.Div([
         html.H2(" Vue d'Ensemble", style={'color': COLORS['text'], 'marginBottom': '1.5rem', 'fontSize': '1.75rem', 'fontWeight': '700'}),
         html.Div([
@@ -161,7 +307,13 @@ app.layout = html.Div([
     html.Div([
         html.H2(" Analyse Temporelle", style={'color': COLORS['text'], 'marginBottom': '1.5rem', 'fontSize': '1.75rem', 'fontWeight': '700'}),
         html.Div([
-            html.Div([html.Div(" Évolution Temporelle du nombre d'articles", className='viz-title'), dcc.Graph(id='viz-temporal')], className='viz-card'),
+            html.Div([
+                html.Div(" Évolution Temporelle du nombre d'articles", className='viz-title'),
+                dcc.RadioItems(id='temporal-granularity', value='M', inline=True,
+                    options=[{'label': ' Jour', 'value': 'D'}, {'label': ' Semaine', 'value': 'W'}, {'label': ' Mois', 'value': 'M'}],
+                    labelStyle={'marginRight': '1rem'}, style={'color': COLORS['text'], 'marginBottom': '0.5rem'}),
+                dcc.Graph(id='viz-temporal')
+            ], className='viz-card'),
             html.Div([html.Div(" Pics d'Attention temporelle", className='viz-title'), dcc.Graph(id='viz-attention-peaks')], className='viz-card'),
         ], className='viz-grid'),
     ], style={'marginBottom': '3rem'}),
@@ -176,6 +328,10 @@ app.layout = html.Div([
                     html.Label("Sélectionner un mot-clé", style={'color': COLORS['text'], 'fontWeight': '600', 'marginBottom': '0.5rem'}),
                     dcc.Dropdown(id='word-selector', options=[], value='sputnik', placeholder="Choisir..."),
                 ], style={'marginBottom': '1rem'}),
+                html.Div([
+                    html.Label("Profondeur du réseau", style={'color': COLORS['text'], 'fontWeight': '600', 'marginBottom': '0.5rem'}),
+                    dcc.Slider(id='network-depth', min=1, max=3, step=1, value=1, marks={i: str(i) for i in range(1, 4)}),
+                ], style={'marginBottom': '1rem'}),
                 dcc.Graph(id='viz-word-network')
             ], className='viz-card'),
         ], className='viz-grid'),
@@ -190,217 +346,247 @@ app.layout = html.Div([
 ], id='dashboard-container')
 
 # Callbacks
+def partial_update(figure, triggers, layout_keys=()):
+    # Seules les traces (et quelques clés de layout) changent quand l'un des déclencheurs bouge : envoi d'un Patch
+    try:
+        trigger = ctx.triggered_id
+    except MissingCallbackContextException:
+        trigger = None
+    if trigger not in triggers:
+        return figure
+    patch = Patch()
+    patch['data'] = figure['data']
+    for key in layout_keys:
+        patch['layout'][key] = figure['layout'].get(key)
+    return patch
+
+@app.callback(
+    [Output('date-range', 'start_date'), Output('date-range', 'end_date'),
+     Output('date-range', 'min_date_allowed'), Output('date-range', 'max_date_allowed')],
+    [Input('period-filter', 'value'), Input('corpus-filter', 'value')]
+)
+def update_date_range(period, corpus_selected):
+    # Les périodes prédéfinies remplissent l'intervalle de dates, qui pilote toutes les vues
+    start, end = get_period_bounds(corpus_selected, period)
+    first_day, last_day = get_period_bounds(corpus_selected, 'all')
+    return tuple(d.isoformat() if d else None for d in (start, end, first_day, last_day))
+
 @app.callback(
     Output('kpi-container', 'children'),
-    [Input('corpus-filter', 'value'), Input('period-filter', 'value')]
+    [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date')]
 )
-def update_kpis(corpus_selected, period):
-    kpis = calculate_kpis(corpus_selected, period)
-    corpus_emoji = '🔴' if corpus_selected == 'Macron/France' else ('🔵' if corpus_selected == 'Poutine/Russie' else '🟣')
+@cached('kpi-container', data_stamp)
+@timed('render')
+def update_kpis(corpus_selected, start_date, end_date):
+    kpis = calculate_kpis(corpus_selected, parse_date(start_date), parse_date(end_date))
     
     return [
         html.Div([html.Div("Total d'Articles", className='kpi-label'), html.Div(f"{kpis['total_articles']:,}", className='kpi-value'), html.Div(" Publications", className='kpi-trend')], className='kpi-card'),
-        html.Div([html.Div("Période Analysée", className='kpi-label'), html.Div(kpis['period'], className='kpi-value', style={'fontSize': '2rem'}), html.Div(f"{corpus_emoji} {corpus_selected}", className='kpi-trend')], className='kpi-card'),
+        html.Div([html.Div("Période Analysée", className='kpi-label'), html.Div(kpis['period'], className='kpi-value', style={'fontSize': '2rem'}), html.Div(f"{corpus_emoji(corpus_selected)} {corpus_selected}", className='kpi-trend')], className='kpi-card'),
         html.Div([html.Div("Mots-clés Uniques", className='kpi-label'), html.Div(f"{kpis['total_kws']:,}", className='kpi-value'), html.Div(" Termes", className='kpi-trend')], className='kpi-card'),
         html.Div([html.Div("Lieux Mentionnés", className='kpi-label'), html.Div(f"{kpis['total_loc']:,}", className='kpi-value'), html.Div(" Zones", className='kpi-trend')], className='kpi-card'),
     ]
 
-@app.callback(Output('word-selector', 'options'), [Input('corpus-filter', 'value'), Input('top-n-slider', 'value')])
-def update_word_selector(corpus_selected, top_n):
-    data = get_data_by_corpus(corpus_selected)
-    df_top = get_top_entities(data, 'kws', top_n)
+@app.callback(Output('word-selector', 'options'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date'), Input('top-n-slider', 'value')])
+@cached('word-selector', data_stamp)
+@timed('render')
+def update_word_selector(corpus_selected, start_date, end_date, top_n):
+    df_top = get_top_entities(corpus_selected, 'kws', top_n, parse_date(start_date), parse_date(end_date))
     return [{'label': word, 'value': word} for word in df_top['entity'].tolist()]
 
-@app.callback(
-    [Output('viz-top-keywords', 'figure'), Output('viz-geography', 'figure'),
-     Output('viz-temporal', 'figure'), Output('viz-attention-peaks', 'figure'), Output('viz-correlation', 'figure'),
-     Output('viz-word-network', 'figure'), Output('viz-actors-locations', 'figure')],
-    [Input('corpus-filter', 'value'), Input('period-filter', 'value'), Input('top-n-slider', 'value'), Input('word-selector', 'value')]
-)
-def update_all_visualizations(corpus_selected, period, top_n, selected_word):
-    data = get_data_by_corpus(corpus_selected)
-    df_temporal = get_temporal_data(corpus_selected)
-    
-    if period == '2024':
-        df_temporal = df_temporal[df_temporal['year'] == '2024']
-    elif period == '2025':
-        df_temporal = df_temporal[df_temporal['year'] == '2025']
-    elif period == 'last6':
-        cutoff = df_temporal['date'].max() - timedelta(days=180)
-        df_temporal = df_temporal[df_temporal['date'] >= cutoff]
-    
-    main_color = COLORS['macron'] if corpus_selected == 'Macron/France' else (COLORS['poutine'] if corpus_selected == 'Poutine/Russie' else COLORS['combined'])
-    
-    # VIZ 1: Top Keywords
-    df_top = get_top_entities(data, 'kws', top_n)
+# VIZ 1: Top Keywords
+@app.callback(Output('viz-top-keywords', 'figure'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date'), Input('top-n-slider', 'value')])
+def update_top_keywords(corpus_selected, start_date, end_date, top_n):
+    return partial_update(top_keywords_figure(corpus_selected, start_date, end_date, top_n), ('top-n-slider',))
+
+@cached('viz-top-keywords', data_stamp)
+@timed('figure')
+def top_keywords_figure(corpus_selected, start_date, end_date, top_n):
+    main_color = corpus_color(corpus_selected)
+    df_top = get_top_entities(corpus_selected, 'kws', top_n, parse_date(start_date), parse_date(end_date))
     fig_top = px.bar(df_top, y='entity', x='count', orientation='h', color_discrete_sequence=[main_color])
     fig_top.update_traces(text=df_top['count'], textposition='outside', hovertemplate='<b>%{y}</b><br>Fréquence: %{x}<extra></extra>')
     fig_top.update_layout(
-        template='plotly_white', paper_bgcolor=COLORS['bg_card'], plot_bgcolor=COLORS['bg_card'],
+        template='sputnik', paper_bgcolor=COLORS['bg_card'], plot_bgcolor=COLORS['bg_card'],
         font=dict(color=COLORS['text']), xaxis_title="Fréquence", yaxis_title="",
         yaxis=dict(autorange="reversed"), height=600, margin=dict(l=150)
     )
-    
-    # VIZ 2: Géographie
-    df_geo_m = get_top_entities(data_macron['metadata']['all'], 'loc', 15)
-    df_geo_p = get_top_entities(data_poutine['metadata']['all'], 'loc', 15)
-    df_geo_m['corpus'] = 'Macron/France'
-    df_geo_p['corpus'] = 'Poutine/Russie'
+    return fig_top
+
+# VIZ 2: Géographie
+@app.callback(Output('viz-geography', 'figure'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date')])
+@cached('viz-geography', data_stamp)
+@timed('figure')
+def update_geography(corpus_selected, start_date, end_date):
+    start, end = parse_date(start_date), parse_date(end_date)
+    main_color = corpus_color(corpus_selected)
+    selected_stores = get_selected_stores(corpus_selected)
+    corpus_colors = {name: corpus_color(name) for name, _ in selected_stores}
+    df_geo = pd.concat([get_top_entities(name, 'loc', 15, start, end).assign(corpus=name) for name, _ in selected_stores]
+                       or [pd.DataFrame(columns=['entity', 'count', 'corpus'])])
     
     if corpus_selected == 'Combined':
-        df_geo = pd.concat([df_geo_m, df_geo_p])
         fig_geo = px.bar(df_geo, x='count', y='entity', color='corpus', orientation='h',
-            color_discrete_map={'Macron/France': COLORS['macron'], 'Poutine/Russie': COLORS['poutine']}, barmode='group')
+            color_discrete_map=corpus_colors, barmode='group')
     else:
-        df_geo = df_geo_m if corpus_selected == 'Macron/France' else df_geo_p
         fig_geo = px.bar(df_geo, x='count', y='entity', orientation='h', color_discrete_sequence=[main_color])
-    fig_geo.update_layout(template='plotly_white', paper_bgcolor=COLORS['bg_card'], height=600,
+    fig_geo.update_layout(template='sputnik', paper_bgcolor=COLORS['bg_card'], height=600,
         xaxis_title="Nombre de mentions", yaxis_title="Lieu", legend_title="Corpus")
-    
-    # VIZ 3: Évolution temporelle
+    return fig_geo
+
+# VIZ 3: Évolution temporelle
+@app.callback(Output('viz-temporal', 'figure'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date'), Input('temporal-granularity', 'value')])
+def update_temporal(corpus_selected, start_date, end_date, freq):
+    return partial_update(temporal_figure(corpus_selected, start_date, end_date, freq), ('temporal-granularity',))
+
+@cached('viz-temporal', data_stamp)
+@timed('figure')
+def temporal_figure(corpus_selected, start_date, end_date, freq):
+    df_temporal = get_temporal_data(corpus_selected, parse_date(start_date), parse_date(end_date), freq)
+    main_color = corpus_color(corpus_selected)
+    selected_stores = get_selected_stores(corpus_selected)
+    corpus_colors = {name: corpus_color(name) for name, _ in selected_stores}
     if corpus_selected == 'Combined':
         fig_temporal = px.line(df_temporal, x='date', y='n_articles', color='corpus', markers=True,
-            color_discrete_map={'Macron/France': COLORS['macron'], 'Poutine/Russie': COLORS['poutine']})
+            color_discrete_map=corpus_colors)
     else:
         fig_temporal = px.line(df_temporal, x='date', y='n_articles', markers=True, color_discrete_sequence=[main_color])
-    fig_temporal.update_layout(template='plotly_white', paper_bgcolor=COLORS['bg_card'], font=dict(color=COLORS['text']),
+    fig_temporal.update_layout(template='sputnik', paper_bgcolor=COLORS['bg_card'], font=dict(color=COLORS['text']),
         xaxis_title="Date", yaxis_title="Nombre d'articles", hovermode='x unified', height=400)
+    return fig_temporal
+
+# VIZ 4: Heatmap temporelle
+@app.callback(Output('viz-attention-peaks', 'figure'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date')])
+@cached('viz-attention-peaks', attention_peaks_stamp)
+@timed('figure')
+def update_attention_peaks(corpus_selected, start_date, end_date):
+    months, rows = get_attention_peaks(corpus_selected, parse_date(start_date), parse_date(end_date))
     
-    # VIZ 4: Heatmap temporelle
-    top_kws_for_heatmap = ['russie', 'ukraine', 'france', 'afrique', 'poutine', 'macron', 'guerre', 'président']
-    heatmap_data = []
-    source_data = data_macron if corpus_selected == 'Macron/France' else (data_poutine if corpus_selected == 'Poutine/Russie' else None)
-    
-    if source_data:
-        for kw in top_kws_for_heatmap:
-            for year in ['2024', '2025']:
-                for month in range(1, 13):
-                    try:
-                        count = source_data['metadata']['month'].get(year, {}).get(str(month), {}).get('kws', {}).get(kw, 0)
-                        if count > 0:
-                            heatmap_data.append({'keyword': kw.capitalize(), 'date': f"{year}-{str(month).zfill(2)}", 'count': count})
-                    except: pass
-    else:
-        for kw in top_kws_for_heatmap:
-            for year in ['2024', '2025']:
-                for month in range(1, 13):
-                    try:
-                        count_m = data_macron['metadata']['month'].get(year, {}).get(str(month), {}).get('kws', {}).get(kw, 0)
-                        count_p = data_poutine['metadata']['month'].get(year, {}).get(str(month), {}).get('kws', {}).get(kw, 0)
-                        total = count_m + count_p
-                        if total > 0:
-                            heatmap_data.append({'keyword': kw.capitalize(), 'date': f"{year}-{str(month).zfill(2)}", 'count': total})
-                    except: pass
-    
-    if heatmap_data:
-        df_heatmap = pd.DataFrame(heatmap_data).pivot(index='keyword', columns='date', values='count').fillna(0)
+    if rows and months:
+        # Libellé suffixé du type d'entité si un même terme apparaît sous deux types
+        labels = [term for _, term, _, _ in rows]
+        labels = [f"{term} ({ENTITY_NAMES[ent]})" if labels.count(term) > 1 else term for ent, term, _, _ in rows]
         fig_attention = go.Figure(data=go.Heatmap(
-            z=df_heatmap.values,
-            x=df_heatmap.columns,
-            y=df_heatmap.index,
+            z=[np.round(z, 1) for _, _, _, z in rows],
+            x=months,
+            y=labels,
+            text=[counts for _, _, counts, _ in rows],
+            customdata=[[[ent, term, month] for month in months] for ent, term, _, _ in rows],
             colorscale='RdYlBu_r',
-            colorbar=dict(title="Mentions"),
-            hovertemplate='Mot-clé: <b>%{y}</b><br>Mois: %{x}<br>Mentions: %{z}<extra></extra>'
+            zmid=0,
+            colorbar=dict(title="Score z"),
+            hovertemplate='<b>%{y}</b><br>Mois: %{x}<br>Mentions: %{text}<br>Score z: %{z}<extra></extra>'
         ))
         fig_attention.update_layout(
-            template='plotly_white', 
+            template='sputnik', 
             paper_bgcolor=COLORS['bg_card'], 
             plot_bgcolor=COLORS['bg_card'],
             font=dict(color=COLORS['text']),
             xaxis_title="Mois",
-            yaxis_title="Mot-clé",
-            height=400
+            yaxis_title="Terme émergent",
+            yaxis=dict(autorange="reversed"),
+            height=max(400, 32 * len(rows))
         )
     else:
         fig_attention = go.Figure()
         fig_attention.add_annotation(text="Données insuffisantes", x=0.5, y=0.5, showarrow=False)
-        fig_attention.update_layout(template='plotly_white', paper_bgcolor=COLORS['bg_card'], height=400)
-    
-    # VIZ 5: Sankey
-    df_actors = get_top_entities(data, 'per', 8)
-    df_locs = get_top_entities(data, 'loc', 8)
+        fig_attention.update_layout(template='sputnik', paper_bgcolor=COLORS['bg_card'], height=400)
+    return fig_attention
+
+# VIZ 5: Sankey
+@app.callback(Output('viz-correlation', 'figure'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date')])
+@cached('viz-correlation', data_stamp)
+@timed('figure')
+def update_correlation(corpus_selected, start_date, end_date):
+    start, end = parse_date(start_date), parse_date(end_date)
+    main_color = corpus_color(corpus_selected)
+    df_actors = get_top_entities(corpus_selected, 'per', 8, start, end)
+    df_locs = get_top_entities(corpus_selected, 'loc', 8, start, end)
+    matrix = get_cooccurrence(corpus_selected, 'per', df_actors['entity'].tolist(), 'loc', df_locs['entity'].tolist(), start, end)
     sources, targets, values = [], [], []
-    for i, actor in enumerate(df_actors['entity'].tolist()):
-        actor_count = df_actors.iloc[i]['count']
-        for j in range(min(3, len(df_locs))):
-            sources.append(i)
-            targets.append(len(df_actors) + j)
-            values.append(actor_count * (0.5 - j * 0.15))
+    for i in range(len(df_actors)):
+        # Les 3 lieux les plus co-cités avec chaque acteur
+        for j in np.argsort(-matrix[i], kind='stable')[:3]:
+            if matrix[i, j] > 0:
+                sources.append(i)
+                targets.append(len(df_actors) + int(j))
+                values.append(int(matrix[i, j]))
     
     all_labels = df_actors['entity'].tolist() + df_locs['entity'].tolist()
     fig_correlation = go.Figure(go.Sankey(
         node=dict(pad=15, thickness=20, label=all_labels, color=main_color),
         link=dict(source=sources, target=targets, value=values, color='rgba(14, 165, 233, 0.2)')
     ))
-    fig_correlation.update_layout(template='plotly_white', paper_bgcolor=COLORS['bg_card'], height=600)
-    
-    # VIZ 6: Réseau interactif
+    fig_correlation.update_layout(template='sputnik', paper_bgcolor=COLORS['bg_card'], height=600)
+    return fig_correlation
+
+# VIZ 6: Réseau interactif
+@app.callback(Output('viz-word-network', 'figure'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date'), Input('word-selector', 'value'), Input('network-depth', 'value')])
+def update_word_network(corpus_selected, start_date, end_date, selected_word, depth):
+    return partial_update(word_network_figure(corpus_selected, start_date, end_date, selected_word, depth),
+                          ('word-selector', 'network-depth'), ('title', 'annotations'))
+
+@cached('viz-word-network', data_stamp)
+@timed('figure')
+def word_network_figure(corpus_selected, start_date, end_date, selected_word, depth):
+    main_color = corpus_color(corpus_selected)
     if selected_word:
-        G_word = nx.Graph()
-        G_word.add_node(selected_word, central=True)
-        all_kws = sorted(data['kws'].items(), key=lambda x: x[1], reverse=True)[:50]
-        selected_freq = data['kws'].get(selected_word, 0)
-        connected_words = [(w, f) for w, f in all_kws if w != selected_word and abs(f - selected_freq) < selected_freq * 0.8][:10]
-        for word, freq in connected_words:
-            G_word.add_node(word, central=False)
-            G_word.add_edge(selected_word, word)
-        pos_word = nx.spring_layout(G_word, k=1, iterations=50)
+        nodes, edges, pos_word = get_ego_network(corpus_selected, selected_word, depth or 1, parse_date(start_date), parse_date(end_date))
+        # Coordonnées arrondies : précision suffisante à l'écran, JSON plus léger
+        pos_word = {w: (round(x, 3), round(y, 3)) for w, (x, y) in pos_word.items()}
         
-        edge_trace = go.Scatter(x=[], y=[], line=dict(width=2, color=main_color), mode='lines', opacity=0.5)
-        for edge in G_word.edges():
-            x0, y0 = pos_word[edge[0]]
-            x1, y1 = pos_word[edge[1]]
-            edge_trace['x'] += tuple([x0, x1, None])
-            edge_trace['y'] += tuple([y0, y1, None])
+        edge_x, edge_y = [], []
+        for source, target, _, _ in edges:
+            edge_x += [pos_word[source][0], pos_word[target][0], None]
+            edge_y += [pos_word[source][1], pos_word[target][1], None]
+        edge_trace = go.Scatter(x=edge_x, y=edge_y, line=dict(width=2, color=main_color), mode='lines', opacity=0.5, hoverinfo='skip')
         
-        node_trace = go.Scatter(x=[], y=[], text=[], mode='markers+text', textposition="top center",
-            marker=dict(size=[], color=[], colorscale=[[0, COLORS['secondary']], [1, main_color]]))
-        for node in G_word.nodes():
-            x, y = pos_word[node]
-            node_trace['x'] += tuple([x])
-            node_trace['y'] += tuple([y])
-            node_trace['text'] += tuple([node])
-            is_central = G_word.nodes[node].get('central', False)
-            node_trace['marker']['size'] += tuple([50 if is_central else 30])
-            node_trace['marker']['color'] += tuple([1 if is_central else 0])
+        words = list(nodes)
+        cooc_counts = {target: count for _, target, count, _ in edges}
+        node_trace = go.Scatter(x=[pos_word[w][0] for w in words], y=[pos_word[w][1] for w in words], text=words,
+            mode='markers+text', textposition="top center", hoverinfo='text',
+            hovertext=[f"<b>{w}</b><br>Co-occurrences avec '{nodes[w][1]}': {cooc_counts[w]}" if w in cooc_counts else f"<b>{w}</b>" for w in words],
+            marker=dict(size=[NETWORK_NODE_SIZES[min(nodes[w][0], len(NETWORK_NODE_SIZES) - 1)] for w in words],
+                        color=[1 if nodes[w][0] == 0 else 0 for w in words], colorscale=[[0, COLORS['secondary']], [1, main_color]]))
         
         fig_word = go.Figure(data=[edge_trace, node_trace])
-        fig_word.update_layout(template='plotly_white', paper_bgcolor=COLORS['bg_card'], showlegend=False, height=500,
+        fig_word.update_layout(template='sputnik', paper_bgcolor=COLORS['bg_card'], showlegend=False, height=500,
             xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
             yaxis=dict(showgrid=False, zeroline=False, showticklabels=False), title=f"Connexions de '{selected_word}'")
     else:
         fig_word = go.Figure()
         fig_word.add_annotation(text="Sélectionnez un mot-clé", x=0.5, y=0.5, showarrow=False, font=dict(size=16))
-        fig_word.update_layout(template='plotly_white', paper_bgcolor=COLORS['bg_card'], height=500,
+        fig_word.update_layout(template='sputnik', paper_bgcolor=COLORS['bg_card'], height=500,
             xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
             yaxis=dict(showgrid=False, zeroline=False, showticklabels=False))
-    
-    # VIZ 7: Acteurs-Lieux
+    return fig_word
+
+# VIZ 7: Acteurs-Lieux
+@app.callback(Output('viz-actors-locations', 'figure'), [Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date'), Input('top-n-slider', 'value')])
+def update_actors_locations(corpus_selected, start_date, end_date, top_n):
+    return partial_update(actors_locations_figure(corpus_selected, start_date, end_date, top_n), ('top-n-slider',), ('height',))
+
+@cached('viz-actors-locations', data_stamp)
+@timed('figure')
+def actors_locations_figure(corpus_selected, start_date, end_date, top_n):
+    start, end = parse_date(start_date), parse_date(end_date)
     n_actors = min(top_n, 15)
     n_locs = min(int(top_n * 0.6), 10)
     
-    actors = get_top_entities(data, 'per', n_actors)['entity'].tolist()
-    locations = get_top_entities(data, 'loc', n_locs)['entity'].tolist()
-    matrix = []
-    for actor in actors:
-        actor_freq = data['per'].get(actor, 0)
-        row = []
-        for loc in locations:
-            loc_freq = data['loc'].get(loc, 0)
-            value = min(actor_freq, loc_freq) * np.random.uniform(0.1, 0.5)
-            row.append(value)
-        matrix.append(row)
+    actors = get_top_entities(corpus_selected, 'per', n_actors, start, end)['entity'].tolist()
+    locations = get_top_entities(corpus_selected, 'loc', n_locs, start, end)['entity'].tolist()
+    matrix = get_cooccurrence(corpus_selected, 'per', actors, 'loc', locations, start, end)
     
     fig_actors_loc = go.Figure(data=go.Heatmap(
         z=matrix,
         x=locations,
         y=actors,
         colorscale='RdYlBu_r',
-        colorbar=dict(title="Mentions"),
-        hovertemplate='Acteur: <b>%{y}</b><br>Lieu: %{x}<br>Mentions: %{z:.0f}<extra></extra>'
+        colorbar=dict(title="Co-occurrences"),
+        hovertemplate='Acteur: <b>%{y}</b><br>Lieu: %{x}<br>Co-occurrences: %{z}<extra></extra>'
     ))
     fig_actors_loc.update_layout(
-        template='plotly_white', 
+        template='sputnik', 
         paper_bgcolor=COLORS['bg_card'], 
         plot_bgcolor=COLORS['bg_card'],
         font=dict(color=COLORS['text']),
@@ -408,8 +594,45 @@ def update_all_visualizations(corpus_selected, period, top_n, selected_word):
         yaxis_title="Acteur",
         height=max(500, n_actors * 40)
     )
-    
-    return (fig_top, fig_geo, fig_temporal, fig_attention, fig_correlation, fig_word, fig_actors_loc)
+    return fig_actors_loc
+
+# Recherche et exploration des articles
+DRILLDOWN_GRAPHS = ['viz-top-keywords', 'viz-geography', 'viz-temporal', 'viz-attention-peaks',
+                    'viz-correlation', 'viz-word-network', 'viz-actors-locations']
+
+@app.callback(Output('search-query', 'data'),
+    [Input('search-input', 'value')] + [Input(graph_id, 'clickData') for graph_id in DRILLDOWN_GRAPHS],
+    [State('temporal-granularity', 'value')])
+def update_search_query(text, *clicks):
+    *clicks, freq = clicks
+    click = dict(zip(DRILLDOWN_GRAPHS, clicks)).get(ctx.triggered_id)
+    if click and click.get('points'):
+        query = drilldown_query(ctx.triggered_id, click['points'][0], freq)
+        return query if query is not None else dash.no_update
+    if not text or not text.strip():
+        return None
+    return {'label': text.strip(), 'clauses': [list(clause) for clause in parse_query(text)], 'start': None, 'end': None}
+
+@app.callback(Output('search-results', 'children'),
+    [Input('search-query', 'data'), Input('corpus-filter', 'value'), Input('date-range', 'start_date'), Input('date-range', 'end_date')])
+@timed('render')
+def update_search_results(query, corpus_selected, start_date, end_date):
+    if not query:
+        return html.P("Saisissez une recherche ou cliquez sur un élément d'une visualisation pour lister les articles.",
+                      style={'color': COLORS['text_secondary'], 'marginTop': '1rem'})
+    # Intervalle du clic (mois, période) restreint à l'intervalle des filtres
+    starts = [d for d in (parse_date(start_date), parse_date(query['start'])) if d]
+    ends = [d for d in (parse_date(end_date), parse_date(query['end'])) if d]
+    total, articles = get_articles(corpus_selected, [tuple(clause) for clause in query['clauses']],
+                                   max(starts, default=None), min(ends, default=None))
+    items = [html.Li([
+        html.Span(article['date'].strftime('%d/%m/%Y'), className='search-date'),
+        html.A(article['title'] or article['url'], href=article['url'], target='_blank', rel='noopener'),
+        html.Span(article['corpus'], className='badge badge-secondary', style={'backgroundColor': corpus_color(article['corpus'])}),
+    ], className='search-item') for article in articles]
+    shown = f" ({len(articles)} plus récents)" if total > len(articles) else ""
+    return [html.Div(f"{total:,} article(s) pour « {query['label']} »{shown}", className='search-summary'),
+            html.Ul(items, className='search-list')]
 
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=8050)
\ No newline at end of file
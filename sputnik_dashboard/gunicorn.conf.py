@@ -0,0 +1,17 @@
+import os
+import multiprocessing
+
+# Lancement : gunicorn "wsgi:create_app()" -c gunicorn.conf.py (depuis le dossier sputnik_dashboard)
+bind = os.environ.get('SPUTNIK_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('SPUTNIK_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('SPUTNIK_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.environ.get('SPUTNIK_TIMEOUT', '120'))
+# Corpus ouverts une fois dans le processus maître, puis partagés par fork
+preload_app = True
+# Recyclage périodique des workers (fuites éventuelles), décalé pour ne pas les redémarrer ensemble
+max_requests = int(os.environ.get('SPUTNIK_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Cache des figures commun à tous les workers
+os.environ.setdefault('SPUTNIK_CACHE_BACKEND', 'file')
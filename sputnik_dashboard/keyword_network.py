@@ -0,0 +1,160 @@
+import os
+import math
+
+import numpy as np
+
+from vocabulary import top_n
+
+# Configuration des réseaux ego de mots-clés
+NETWORK_TOP_K = int(os.environ.get('SPUTNIK_NETWORK_TOP_K', '500'))
+NETWORK_NEIGHBORS = 10
+NETWORK_MIN_COUNT = 2
+# 'lmi' = PMI pondérée par les co-occurrences (évite la sur-représentation des termes rares)
+NETWORK_WEIGHT = os.environ.get('SPUTNIK_NETWORK_WEIGHT', 'lmi')
+NETWORK_WEIGHTS = ('lmi', 'pmi', 'count')
+# Nombre de voisins développés à chaque niveau de profondeur
+NETWORK_WIDTHS = (10, 4, 2)
+
+
+def rank_neighbors(cols, counts, col_freq, row_freq, n_segments, m, weight, min_count=NETWORK_MIN_COUNT):
+    # Classement des voisins d'un terme : PMI / LMI (co-occurrences fréquentes seulement) ou comptes bruts
+    cols, counts = np.asarray(cols), np.asarray(counts, dtype=np.float64)
+    frequent = counts >= min_count
+    if frequent.any():
+        cols, counts = cols[frequent], counts[frequent]
+    if weight in ('pmi', 'lmi'):
+        scores = np.log(counts * n_segments / (np.maximum(row_freq, 1) * np.maximum(np.asarray(col_freq, dtype=np.float64)[cols], 1)))
+        if weight == 'lmi':
+            scores = counts * scores
+    else:
+        scores = counts
+    k = min(m, len(cols))
+    if k == 0:
+        return cols[:0], counts[:0], scores[:0]
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(cols) else np.arange(len(cols))
+    top = top[np.lexsort((-counts[top], -scores[top]))]
+    return cols[top], counts[top].astype(np.int64), scores[top]
+
+
+def row_neighbors(total, seg_freq, n_segments, i, m, weight):
+    lo, hi = total.indptr[i], total.indptr[i + 1]
+    return rank_neighbors(total.indices[lo:hi], total.data[lo:hi], seg_freq, seg_freq[i], n_segments, m, weight)
+
+
+def build_neighbors(path, total, seg_freq, n_segments, totals, top_k=NETWORK_TOP_K, m=NETWORK_NEIGHBORS):
+    # Listes de voisins pré-calculées pour les top-K mots-clés les plus fréquents
+    terms = top_n(np.asarray(totals), top_k)
+    np.save(os.path.join(path, 'kws_nbr_terms.npy'), terms.astype(np.int32))
+    for weight in NETWORK_WEIGHTS:
+        ids = np.full((len(terms), m), -1, dtype=np.int32)
+        scores = np.zeros((len(terms), m), dtype=np.float32)
+        for row, i in enumerate(terms):
+            cols, _, sc = row_neighbors(total, seg_freq, n_segments, i, m, weight)
+            ids[row, :len(cols)] = cols
+            scores[row, :len(cols)] = sc
+        np.save(os.path.join(path, f'kws_nbr_{weight}_ids.npy'), ids)
+        np.save(os.path.join(path, f'kws_nbr_{weight}_scores.npy'), scores)
+
+
+class StoreNeighbors:
+    # Voisinage des mots-clés d'un corpus sur un intervalle de dates : marginales calculées une fois, lignes lues à la
+    # demande dans l'index (aucune matrice de l'intervalle construite)
+    def __init__(self, store, start=None, end=None, remap=None):
+        self.store = store
+        self.full = store.is_full_range(start, end)
+        self.days = store.day_range(start, end)
+        self.index = store.cooccurrence('kws', 'kws')
+        self.seg_freq = np.asarray(store.seg_freq('kws', start, end))
+        self.n_segments = store.segments_in(start, end)
+        # ids locaux -> ids du vocabulaire global, pour la fusion de plusieurs corpus
+        self.remap = remap
+
+    def row(self, i):
+        # (voisins, co-occurrences) du mot-clé d'id local i, voisins triés par id
+        return self.index.row(i, *self.days)
+
+    def neighbors(self, word, m, weight=NETWORK_WEIGHT):
+        # [(terme, co-occurrences, score)] : lecture directe des listes pré-calculées si possible
+        i = self.store.term_ids['kws'].get(word)
+        if i is None:
+            return []
+        vocab = self.store.vocab['kws']
+        rows, ids, scores = self.store.neighbor_lists(weight)
+        cols, counts = self.row(i)
+        if self.full and i in rows and m <= ids.shape[1]:
+            row = rows[i]
+            top = [j for j in ids[row, :m] if j >= 0]
+            found = counts[np.searchsorted(cols, top)]
+            return [(vocab[j], int(c), float(sc)) for j, c, sc in zip(top, found, scores[row, :len(top)])]
+        cols, counts, sc = rank_neighbors(cols, counts, self.seg_freq, self.seg_freq[i], self.n_segments, m, weight)
+        return [(vocab[j], int(c), float(x)) for j, c, x in zip(cols, counts, sc)]
+
+
+def merged_neighbors(sources, word, m, weight=NETWORK_WEIGHT, terms=None):
+    # Fusion N-voies : lignes du mot dans chaque corpus ramenées au vocabulaire global (terms), comptes et fréquences
+    # de segments sommés par terme, puis re-classement
+    if len(sources) == 1:
+        return sources[0].neighbors(word, m, weight)
+    cols, counts, freqs, word_freq, n_segments = [], [], [], 0, 0
+    for source in sources:
+        n_segments += source.n_segments
+        i = source.store.term_ids['kws'].get(word)
+        if i is None:
+            continue
+        word_freq += int(source.seg_freq[i])
+        local, row_counts = source.row(i)
+        cols.append(source.remap[local])
+        counts.append(row_counts)
+        freqs.append(source.seg_freq[local])
+    if not cols:
+        return []
+    # Sommes par id global (bincount sur le vocabulaire global : pas de tri des lignes fusionnées)
+    cols = np.concatenate(cols)
+    counts = np.bincount(cols, weights=np.concatenate(counts), minlength=len(terms))
+    freqs = np.bincount(cols, weights=np.concatenate(freqs), minlength=len(terms))
+    cols = np.flatnonzero(counts)
+    if not len(cols):
+        return []
+    top, counts, sc = rank_neighbors(np.arange(len(cols)), counts[cols], freqs[cols], word_freq, n_segments, m, weight)
+    return [(terms[cols[j]], int(c), float(x)) for j, c, x in zip(top, counts, sc)]
+
+
+def ego_network(neighbors_fn, word, depth, widths=NETWORK_WIDTHS):
+    # Parcours en largeur : noeuds {terme: (niveau, parent)} et arêtes (source, cible, co-occurrences, score)
+    nodes = {word: (0, None)}
+    edges = []
+    frontier = [word]
+    for level in range(1, depth + 1):
+        next_frontier = []
+        for source in frontier:
+            for term, count, score in neighbors_fn(source, widths[min(level, len(widths)) - 1]):
+                if term not in nodes:
+                    nodes[term] = (level, source)
+                    next_frontier.append(term)
+                    edges.append((source, term, count, score))
+        frontier = next_frontier
+    return nodes, edges
+
+
+def radial_layout(nodes):
+    # Disposition radiale analytique : un anneau par niveau, chaque enfant dans le secteur de son parent
+    children = {}
+    for term, (level, parent) in nodes.items():
+        if parent is not None:
+            children.setdefault(parent, []).append(term)
+    pos, sectors = {}, {}
+    root = next(iter(nodes))
+    pos[root], sectors[root] = (0.0, 0.0), (0.0, 2 * math.pi)
+    queue = [root]
+    while queue:
+        parent = queue.pop(0)
+        kids = children.get(parent, [])
+        start, width = sectors[parent]
+        step = width / max(len(kids), 1)
+        for k, term in enumerate(kids):
+            angle = start + step * (k + 0.5)
+            radius = nodes[term][0]
+            pos[term] = (radius * math.cos(angle), radius * math.sin(angle))
+            sectors[term] = (start + step * k, step)
+            queue.append(term)
+    return pos
@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+import contextlib
+from collections import Counter
+
+# Instrumentation optionnelle (désactivée par défaut) : SPUTNIK_METRICS=1 active les mesures et l'endpoint /metrics
+METRICS_ENABLED = os.environ.get('SPUTNIK_METRICS', '0') not in ('', '0')
+# Instantanés par processus, sommés par /metrics (un worker gunicorn ne voit que ses propres requêtes)
+METRICS_DIR = os.environ.get('SPUTNIK_METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.metrics'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('SPUTNIK_METRICS_FLUSH_INTERVAL', '5'))
+# Profileur par échantillonnage des callbacks en cours : piles agrégées au format « folded » (flamegraph.pl, speedscope)
+PROFILE_DIR = os.environ.get('SPUTNIK_PROFILE_DIR')
+PROFILE_INTERVAL = float(os.environ.get('SPUTNIK_PROFILE_INTERVAL', '0.005'))
+PROFILE_DUMP_INTERVAL = 30
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Nom -> (type, aide, étiquettes, seuils des histogrammes)
+METRICS = {
+    'sputnik_callback_seconds': ('histogram', "Durée d'une requête de callback Dash (sérialisation de la réponse comprise)",
+                                 ('callback',), SECONDS_BUCKETS),
+    'sputnik_stage_seconds': ('histogram', "Temps propre de chaque étape d'un callback (hors étapes imbriquées)",
+                              ('callback', 'stage'), SECONDS_BUCKETS),
+    'sputnik_payload_bytes': ('histogram', "Taille des figures sérialisées et des réponses de callback (avant compression)",
+                              ('kind', 'name'), BYTES_BUCKETS),
+    'sputnik_cache_requests_total': ('counter', "Accès au cache des callbacks par résultat (hit, miss, stale)",
+                                     ('namespace', 'result'), None),
+}
+
+_local = threading.local()
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class MetricSet:
+    # Compteurs et histogrammes d'un processus : {nom: {valeurs d'étiquettes: valeur ou [comptes par seuil..., somme]}}
+    def __init__(self):
+        self.values = {name: {} for name in METRICS}
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            series = self.values[name]
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        k = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        with self._lock:
+            series = self.values[name]
+            if labels not in series:
+                series[labels] = [0] * (len(buckets) + 2)
+            entry = series[labels]
+            entry[k] += 1
+            entry[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {name: [[list(labels), value] for labels, value in series.items()] for name, series in self.values.items()}
+
+
+metrics = MetricSet()
+
+
+def merge_snapshots(snapshots):
+    merged = {name: {} for name in METRICS}
+    for snapshot in snapshots:
+        for name, series in snapshot.items():
+            if name not in merged:
+                continue
+            for labels, value in series:
+                labels = tuple(labels)
+                current = merged[name].get(labels)
+                if current is None:
+                    merged[name][labels] = value
+                elif isinstance(value, list):
+                    merged[name][labels] = [a + b for a, b in zip(current, value)]
+                else:
+                    merged[name][labels] = current + value
+    return merged
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render(merged):
+    # Format texte d'exposition Prometheus (version 0.0.4)
+    lines = []
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in sorted(merged[name].items()):
+            if kind == 'counter':
+                lines.append(f'{name}{_label_text(label_names, labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_label_text(label_names, labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_label_text(label_names, labels)} {value[-1]:.6f}')
+            lines.append(f'{name}_count{_label_text(label_names, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+# Étapes d'un callback
+def current_callback():
+    return getattr(_local, 'callback', None) or 'none'
+
+
+class Span:
+    # Temps propre d'une étape : le temps des étapes imbriquées est attribué à celles-ci
+    __slots__ = ('stage', 'start', 'children')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.children = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        metrics.observe('sputnik_stage_seconds', (current_callback(), self.stage), elapsed - self.children)
+
+
+def span(stage):
+    return Span(stage) if METRICS_ENABLED else _NULL_SPAN
+
+
+def timed(stage):
+    # Décorateur d'étape ; sans instrumentation la fonction est renvoyée telle quelle (aucun surcoût)
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_cache(namespace, result):
+    metrics.inc('sputnik_cache_requests_total', (namespace, result))
+
+
+def observe_payload(kind, name, size):
+    metrics.observe('sputnik_payload_bytes', (kind, name), size)
+
+
+# Profileur par échantillonnage
+class SamplingProfiler:
+    def __init__(self, directory=PROFILE_DIR, interval=PROFILE_INTERVAL):
+        self.path = os.path.join(directory, f'profile-{os.getpid()}.folded')
+        self.interval = interval
+        self.active = {}
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        threading.Thread(target=self._run, name='sputnik-profiler', daemon=True).start()
+        atexit.register(self.dump)
+
+    def _run(self):
+        last_dump = time.monotonic()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            # Seuls les threads qui exécutent un callback sont échantillonnés (pas les threads inactifs du serveur)
+            for ident, callback in list(self.active.items()):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[';'.join([callback] + stack[::-1])] += 1
+            if time.monotonic() - last_dump > PROFILE_DUMP_INTERVAL:
+                self.dump()
+                last_dump = time.monotonic()
+
+    def dump(self):
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        os.replace(tmp, self.path)
+
+
+# Intégration au serveur Flask de Dash
+_state = {'pid': None, 'flushed': 0.0, 'profiler': None}
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f'metrics-{pid}.json')
+
+
+def flush():
+    tmp = f'{_snapshot_path(os.getpid())}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(metrics.snapshot(), f)
+    os.replace(tmp, _snapshot_path(os.getpid()))
+    _state['flushed'] = time.monotonic()
+
+
+def _ensure_process():
+    # Premier appel dans un worker forké : mesures héritées du maître oubliées, profileur démarré dans ce processus
+    global metrics
+    if _state['pid'] == os.getpid():
+        return
+    _state['pid'] = os.getpid()
+    if metrics.pid != os.getpid():
+        metrics = MetricSet()
+    if PROFILE_DIR:
+        _state['profiler'] = SamplingProfiler()
+
+
+def callback_label(output):
+    # '..date-range.start_date...date-range.end_date..' -> 'date-range' ; 'viz-temporal.figure' -> 'viz-temporal'
+    return ','.join(dict.fromkeys(part.split('.')[0] for part in output.strip('.').split('...') if part))
+
+
+def collect():
+    if METRICS_ENABLED:
+        flush()
+    snapshots = []
+    for entry in os.scandir(METRICS_DIR):
+        if entry.name.startswith('metrics-') and entry.name.endswith('.json'):
+            try:
+                with open(entry.path, encoding='utf-8') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                pass
+    return render(merge_snapshots(snapshots))
+
+
+def install(server):
+    # Hooks de requête et endpoint /metrics, seulement si l'instrumentation ou le profileur est demandé
+    if not (METRICS_ENABLED or PROFILE_DIR):
+        return
+    from flask import Response, request
+
+    if METRICS_ENABLED:
+        # Instantanés d'une exécution précédente retirés (appelé une fois dans le maître avec preload_app)
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        for entry in os.scandir(METRICS_DIR):
+            if entry.name.startswith('metrics-'):
+                os.remove(entry.path)
+
+        @server.route('/metrics')
+        def metrics_endpoint():
+            _ensure_process()
+            return Response(collect(), mimetype='text/plain; version=0.0.4')
+
+    @server.before_request
+    def start_callback():
+        if not request.path.endswith('/_dash-update-component'):
+            return
+        _ensure_process()
+        body = request.get_json(silent=True) or {}
+        _local.callback = callback_label(body.get('output', ''))
+        _local.start = time.perf_counter()
+        if _state['profiler'] is not None:
+            _state['profiler'].active[threading.get_ident()] = _local.callback
+
+    @server.after_request
+    def end_callback(response):
+        start = getattr(_local, 'start', None)
+        if start is None:
+            return response
+        if METRICS_ENABLED:
+            metrics.observe('sputnik_callback_seconds', (_local.callback,), time.perf_counter() - start)
+            if not response.is_streamed:
+                observe_payload('response', _local.callback, response.content_length or len(response.get_data()))
+            if time.monotonic() - _state['flushed'] > METRICS_FLUSH_INTERVAL:
+                flush()
+        return response
+
+    @server.teardown_request
+    def clear_callback(exc):
+        if _state['profiler'] is not None:
+            _state['profiler'].active.pop(threading.get_ident(), None)
+        _local.callback = _local.start = None
@@ -0,0 +1,275 @@
+import os
+
+import numpy as np
+
+from columns import SPILL_CHUNK, ColumnWriter, Partition, link_file, load_bounds
+
+# Listes d'articles par terme : lignes du store (triées par date), écarts encodés en VByte par blocs
+POSTING_BLOCK = 128
+# Un terme présent dans plus d'un article sur DENSE_RATIO est stocké en bitmap
+DENSE_RATIO = 16
+SEARCH_LIMIT = 50
+# Segments d'index accumulés par les ajouts incrémentaux avant reconstruction en un seul
+POSTING_SEGMENTS = 8
+POSTING_FILES = ('_df.npy', '_blocks.npy', '_first.npy', '_offsets.npy', '_dense.npy', '_bitmaps.npy', '.bin')
+
+
+def vbyte_encode(values):
+    # Entiers >= 0 -> octets de 7 bits, bit de poids fort = octet suivant dans le même entier
+    # Retourne les octets et la position de départ de chaque entier
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 5):
+        n_bytes += values >= (1 << (7 * k))
+    starts = np.zeros(len(values), dtype=np.int64)
+    np.cumsum(n_bytes[:-1], out=starts[1:])
+    out = np.zeros(int(n_bytes.sum()), dtype=np.uint8)
+    for k in range(5):
+        has = n_bytes > k
+        byte = (values[has] >> np.uint64(7 * k)) & np.uint64(0x7f)
+        more = (n_bytes[has] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[has] + k] = byte | more
+    return out, starts
+
+
+def vbyte_decode(data):
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shift = (np.arange(len(data)) - np.repeat(starts, ends - starts + 1)) * 7
+    return np.add.reduceat((data & 0x7f).astype(np.int64) << shift, starts)
+
+
+class SegmentWriter:
+    # Transposée de la matrice article x terme (pour chaque terme, ses articles par ordre de ligne croissant), reçue par
+    # blocs de lignes consécutives : bitmaps des termes denses posés au fil des blocs, listes des autres termes rangées
+    # sur disque par tranches de termes puis encodées tranche par tranche à la fermeture
+    def __init__(self, path, prefix, df, n_articles, chunk=SPILL_CHUNK):
+        self.path, self.prefix = path, prefix
+        self.df = np.asarray(df, dtype=np.int64)
+        # Termes très fréquents : bitmap dense (comme les conteneurs denses de roaring), plus compact et testé en O(1)
+        self.dense = np.flatnonzero(self.df * DENSE_RATIO >= n_articles)
+        self.is_dense = np.zeros(len(self.df), dtype=bool)
+        self.is_dense[self.dense] = True
+        self.bitmaps = np.zeros((len(self.dense), (n_articles + 7) // 8), dtype=np.uint8)
+        self.sparse_df = np.where(self.is_dense, 0, self.df)
+        self.postings = Partition(os.path.join(path, prefix), load_bounds(self.sparse_df, chunk), (np.int32, np.int32))
+        self.row0 = 0
+
+    def write(self, indptr, indices):
+        indptr, indices = np.asarray(indptr), np.asarray(indices)
+        rows = self.row0 + np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+        # Bits posés directement dans les octets (ordre de np.packbits : article 8k en bit de poids fort)
+        in_dense = self.is_dense[indices]
+        dense_rows = rows[in_dense]
+        np.bitwise_or.at(self.bitmaps, (np.searchsorted(self.dense, indices[in_dense]), dense_rows >> 3),
+                         (0x80 >> (dense_rows & 7)).astype(np.uint8))
+        keep = ~in_dense
+        self.postings.write(indices[keep], rows[keep])
+        self.row0 += len(indptr) - 1
+
+    def close(self):
+        prefix = os.path.join(self.path, self.prefix)
+        np.save(f'{prefix}_dense.npy', self.dense.astype(np.int32))
+        np.save(f'{prefix}_bitmaps.npy', self.bitmaps)
+        term_ptr = np.zeros(len(self.df) + 1, dtype=np.int64)
+        np.cumsum(self.sparse_df, out=term_ptr[1:])
+        block_ptr = np.zeros(len(self.df) + 1, dtype=np.int64)
+        np.cumsum((self.sparse_df + POSTING_BLOCK - 1) // POSTING_BLOCK, out=block_ptr[1:])
+        np.save(f'{prefix}_df.npy', self.df)
+        np.save(f'{prefix}_blocks.npy', block_ptr)
+
+        # Blocs de POSTING_BLOCK articles : premier article et position en octets, écarts depuis ce premier article
+        first, offsets = ColumnWriter(f'{prefix}_first.npy', np.int32), ColumnWriter(f'{prefix}_offsets.npy', np.int64)
+        n_bytes = 0
+        with open(f'{prefix}.bin', 'wb') as f:
+            for k in range(len(self.postings)):
+                t0, t1 = self.postings.bounds[k], self.postings.bounds[k + 1]
+                terms, rows = self.postings.part(k)
+                postings = rows[np.argsort(terms, kind='stable')].astype(np.int64)
+                rank = np.arange(len(postings)) - np.repeat(term_ptr[t0:t1] - term_ptr[t0], self.sparse_df[t0:t1])
+                head = rank % POSTING_BLOCK == 0
+                deltas = np.diff(postings, prepend=0)
+                deltas[head] = 0
+                data, starts = vbyte_encode(deltas)
+                first.write(postings[head])
+                offsets.write(n_bytes + starts[head])
+                f.write(data.tobytes())
+                n_bytes += len(data)
+        offsets.write([n_bytes])
+        first.close()
+        offsets.close()
+        self.postings.close()
+
+
+def _write_segment(path, prefix, indptr, indices, n_terms):
+    writer = SegmentWriter(path, prefix, np.bincount(indices, minlength=n_terms), len(indptr) - 1)
+    writer.write(indptr, indices)
+    writer.close()
+
+
+def build_postings(path, ent, indptr, indices, n_terms):
+    # Index en un seul segment couvrant toutes les lignes
+    _write_segment(path, f'{ent}_post0', indptr, indices, n_terms)
+    np.save(os.path.join(path, f'{ent}_post_rows.npy'), np.array([0, len(indptr) - 1], dtype=np.int64))
+
+
+def posting_writer(path, ent, df, n_articles):
+    # Index en un seul segment écrit par blocs de lignes (ingestion par tranches)
+    np.save(os.path.join(path, f'{ent}_post_rows.npy'), np.array([0, n_articles], dtype=np.int64))
+    return SegmentWriter(path, f'{ent}_post0', df, n_articles)
+
+
+def extend_postings(old_path, path, ent, indptr, indices, n_terms, row0):
+    # Lignes [row0, n) ajoutées en fin de store : un segment de plus, segments existants liés sans réécriture ;
+    # au-delà de POSTING_SEGMENTS segments, index reconstruit en un seul
+    starts = np.load(os.path.join(old_path, f'{ent}_post_rows.npy'))
+    if len(starts) > POSTING_SEGMENTS:
+        build_postings(path, ent, indptr, indices, n_terms)
+        return
+    for k in range(len(starts) - 1):
+        for suffix in POSTING_FILES:
+            link_file(old_path, path, f'{ent}_post{k}{suffix}')
+    lo = int(indptr[row0])
+    _write_segment(path, f'{ent}_post{len(starts) - 1}', np.asarray(indptr[row0:]) - lo, indices[lo:], n_terms)
+    np.save(os.path.join(path, f'{ent}_post_rows.npy'), np.append(starts, len(indptr) - 1))
+
+
+class PostingSegment:
+    # Listes des lignes [0, n) d'un segment (lignes relatives à son début)
+    def __init__(self, path, prefix):
+        self.df = np.load(os.path.join(path, f'{prefix}_df.npy'), mmap_mode='r')
+        self.block_ptr = np.load(os.path.join(path, f'{prefix}_blocks.npy'), mmap_mode='r')
+        self.first = np.load(os.path.join(path, f'{prefix}_first.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, f'{prefix}_offsets.npy'), mmap_mode='r')
+        self.dense = {int(t): k for k, t in enumerate(np.load(os.path.join(path, f'{prefix}_dense.npy')))}
+        self.bitmaps = np.load(os.path.join(path, f'{prefix}_bitmaps.npy'), mmap_mode='r')
+        size = os.path.getsize(os.path.join(path, f'{prefix}.bin'))
+        self.data = np.memmap(os.path.join(path, f'{prefix}.bin'), dtype=np.uint8, mode='r') if size else np.zeros(0, np.uint8)
+
+    def postings(self, term, lo=0, hi=None):
+        # Lignes d'articles du terme dans [lo, hi) : seuls les octets / blocs recouvrant l'intervalle sont décodés
+        if term >= len(self.df):
+            return np.zeros(0, dtype=np.int64)
+        if term in self.dense:
+            bits = self.bitmaps[self.dense[term]]
+            hi = len(bits) * 8 if hi is None else hi
+            rows = np.flatnonzero(np.unpackbits(bits[lo // 8:(hi + 7) // 8])) + (lo // 8) * 8
+            return rows[(rows >= lo) & (rows < hi)]
+        b_lo, b_hi = int(self.block_ptr[term]), int(self.block_ptr[term + 1])
+        first = self.first[b_lo:b_hi]
+        if hi is not None:
+            b_hi = b_lo + int(np.searchsorted(first, hi, 'left'))
+        b_lo = b_lo + max(int(np.searchsorted(first, lo, 'right')) - 1, 0)
+        if b_hi <= b_lo:
+            return np.zeros(0, dtype=np.int64)
+        deltas = vbyte_decode(self.data[self.offsets[b_lo]:self.offsets[b_hi]])
+        # Dernier bloc du terme éventuellement incomplet
+        sizes = np.full(b_hi - b_lo, POSTING_BLOCK, dtype=np.int64)
+        if b_hi == self.block_ptr[term + 1]:
+            sizes[-1] = int(self.df[term]) - POSTING_BLOCK * (b_hi - 1 - int(self.block_ptr[term]))
+        block = np.repeat(np.arange(b_lo, b_hi), sizes)
+        cum = np.cumsum(deltas)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        rows = self.first[block] + cum - np.repeat(cum[starts], sizes)
+        keep = rows >= lo
+        if hi is not None:
+            keep &= rows < hi
+        return rows[keep]
+
+    def contains(self, term, rows):
+        # Masque d'appartenance de lignes triées à la liste du terme
+        if not len(rows) or term >= len(self.df):
+            return np.zeros(len(rows), dtype=bool)
+        if term in self.dense:
+            bits = self.bitmaps[self.dense[term]]
+            return (bits[rows >> 3] >> (7 - (rows & 7)).astype(np.uint8)) & 1 == 1
+        postings = self.postings(term, int(rows[0]), int(rows[-1]) + 1)
+        if not len(postings):
+            return np.zeros(len(rows), dtype=bool)
+        return postings[np.minimum(np.searchsorted(postings, rows), len(postings) - 1)] == rows
+
+
+class PostingIndex:
+    # Segments successifs (un par ajout de lignes en fin de store) : df sommé, listes concaténées
+    def __init__(self, path, ent):
+        self.starts = np.load(os.path.join(path, f'{ent}_post_rows.npy'))
+        self.segments = [PostingSegment(path, f'{ent}_post{k}') for k in range(len(self.starts) - 1)]
+        if len(self.segments) == 1:
+            self.df = self.segments[0].df
+        else:
+            self.df = np.zeros(max(len(seg.df) for seg in self.segments), dtype=np.int64)
+            for seg in self.segments:
+                self.df[:len(seg.df)] += seg.df
+
+    def postings(self, term, lo=0, hi=None):
+        hi = int(self.starts[-1]) if hi is None else hi
+        parts = [seg.postings(term, max(lo - start, 0), min(hi, end) - start) + start
+                 for seg, start, end in zip(self.segments, self.starts[:-1], self.starts[1:]) if start < hi and end > lo]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def contains(self, term, rows):
+        mask = np.zeros(len(rows), dtype=bool)
+        for seg, start, end in zip(self.segments, self.starts[:-1], self.starts[1:]):
+            i, j = np.searchsorted(rows, [start, end])
+            if j > i:
+                mask[i:j] = seg.contains(term, rows[i:j] - start)
+        return mask
+
+
+def parse_query(text):
+    # 'Emmanuel Macron, afrique' -> [(None, 'emmanuel macron'), (None, 'afrique')] : une clause par expression
+    return [(None, part.strip().lower()) for part in (text or '').split(',') if part.strip()]
+
+
+def term_lookup(store):
+    # Formes en minuscules -> [(type d'entité, id)] pour la recherche libre
+    lookup = {}
+    for ent, vocab in store.vocab.items():
+        for i, term in enumerate(vocab):
+            lookup.setdefault(term.lower(), []).append((ent, i))
+    return lookup
+
+
+def resolve(store, clause):
+    # Clause -> groupes à intersecter, chacun = union de (type d'entité, id) ; None si un mot est inconnu
+    # Une expression inconnue telle quelle est découpée en mots
+    ent, term = clause
+    lookup = store.search_terms
+    if ent is not None:
+        i = store.term_ids[ent].get(term)
+        return None if i is None else [[(ent, i)]]
+    if term in lookup:
+        return [lookup[term]]
+    words = term.split()
+    if len(words) < 2:
+        return None
+    groups = [lookup.get(word) for word in words]
+    return None if any(g is None for g in groups) else groups
+
+
+def search(store, clauses, start=None, end=None):
+    # Articles (lignes triées par date) contenant toutes les clauses, restreints à l'intervalle de dates :
+    # liste la plus courte décodée, puis filtrée par appartenance aux autres
+    lo, hi = store.article_range(start, end)
+    if hi <= lo:
+        return np.zeros(0, dtype=np.int64)
+    groups = []
+    for clause in clauses:
+        resolved = resolve(store, clause)
+        if resolved is None:
+            return np.zeros(0, dtype=np.int64)
+        groups.extend(resolved)
+    if not groups:
+        return np.arange(lo, hi, dtype=np.int64)
+    groups.sort(key=lambda group: sum(int(store.postings[e].df[i]) for e, i in group))
+    lists = [store.postings[e].postings(i, lo, hi) for e, i in groups[0]]
+    rows = lists[0] if len(lists) == 1 else np.unique(np.concatenate(lists))
+    for group in groups[1:]:
+        mask = np.zeros(len(rows), dtype=bool)
+        for e, i in group:
+            mask |= store.postings[e].contains(i, rows)
+        rows = rows[mask]
+    return rows
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+# Modules du dashboard importés à plat, comme depuis le dossier de l'application
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import ZipfSampler, make_article, make_vocabulary  # noqa: E402
+
+VOCAB_SIZES = {'kws': 300, 'loc': 40, 'org': 20, 'per': 40}
+
+
+class ArticleFactory:
+    # Articles synthétiques au format Sputnik (générateur des benchmarks), vocabulaire commun et URL uniques
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+        vocab_rng = np.random.default_rng(seed + 1)
+        self.samplers = {ent: ZipfSampler(make_vocabulary(ent, size, vocab_rng), self.rng) for ent, size in VOCAB_SIZES.items()}
+        self.serial = 0
+
+    def day(self, day, n):
+        articles = []
+        for _ in range(n):
+            articles.append((day, make_article(day, self.serial, self.samplers, self.rng)))
+            self.serial += 1
+        return articles
+
+    def days(self, first, last, per_day=3):
+        # per_day articles pour chaque jour de [first, last] (un jour sur cinq sans article)
+        articles = []
+        for k in range((last - first).days + 1):
+            if k % 5 != 4:
+                articles += self.day(first + timedelta(days=k), per_day)
+        return articles
+
+
+def write_corpus(path, articles):
+    # JSON source : data[année][mois][jour] = articles
+    data = {}
+    for day, article in articles:
+        data.setdefault(str(day.year), {}).setdefault(str(day.month), {}).setdefault(str(day.day), []).append(article)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': {}, 'data': data}, f, ensure_ascii=False)
+    return path
+
+
+def write_batch(path, articles):
+    # Lot JSONL : un article par ligne, jour de publication dans 'date'
+    with open(path, 'w', encoding='utf-8') as f:
+        for day, article in articles:
+            f.write(json.dumps(dict(article, date=day.isoformat()), ensure_ascii=False) + '\n')
+    return path
+
+
+@pytest.fixture
+def factory():
+    return ArticleFactory()
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    return tmp_path
+
+
+FIRST_DAY = date(2025, 1, 6)
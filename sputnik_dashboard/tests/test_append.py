@@ -0,0 +1,122 @@
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+import corpus_store
+from conftest import write_batch, write_corpus
+
+
+def assert_same_store(store, expected):
+    # Même contenu qu'une ingestion complète, termes comparés par leur forme (les ids diffèrent après un ajout)
+    assert store.n_articles == expected.n_articles and store.n_segments == expected.n_segments
+    for name in ('days', 'day_num', 'article_day', 'article_ts', 'day_segments'):
+        assert np.array_equal(getattr(store, name), getattr(expected, name)), name
+    assert [store.urls[i] for i in range(store.n_articles)] == [expected.urls[i] for i in range(expected.n_articles)]
+    ranges = [(None, None)] + [(date.fromordinal(int(a)), date.fromordinal(int(b)))
+                               for a, b in zip(expected.days[::7], expected.days[5::7])]
+    for ent in corpus_store.ENTITY_TYPES:
+        for start, end in ranges:
+            assert store.as_dict(ent, start, end) == expected.as_dict(ent, start, end), (ent, start, end)
+            lo, hi = expected.article_range(start, end)
+            for term in expected.vocab[ent][:40]:
+                assert np.array_equal(store.postings[ent].postings(store.term_ids[ent][term], lo, hi),
+                                      expected.postings[ent].postings(expected.term_ids[ent][term], lo, hi)), (ent, term)
+    for a_ent, b_ent in corpus_store.COOC_PAIRS:
+        for lo, hi in [(0, None)] + [(k, min(k + 9, len(expected.days))) for k in range(0, len(expected.days), 9)]:
+            assert _pairs(store, a_ent, b_ent, lo, hi) == _pairs(expected, a_ent, b_ent, lo, hi), (a_ent, b_ent, lo, hi)
+    for ent in corpus_store.BURST_ENTITIES:
+        assert np.array_equal(store.bursts[ent].months, expected.bursts[ent].months)
+        assert np.array_equal(store.bursts[ent].month_num, expected.bursts[ent].month_num)
+        assert _bursts(store, ent) == _bursts(expected, ent), ent
+
+
+def _pairs(store, a_ent, b_ent, lo, hi):
+    matrix = store.cooccurrence(a_ent, b_ent).matrix(lo, hi).tocoo()
+    return {(store.vocab[a_ent][i], store.vocab[b_ent][j]): int(c) for i, j, c in zip(matrix.row, matrix.col, matrix.data) if c}
+
+
+def _bursts(store, ent):
+    b = store.bursts[ent]
+    return sorted((int(m), store.vocab[ent][t], round(float(z), 4), int(c)) for m, t, z, c in zip(b.month, b.term, b.z, b.count))
+
+
+def appended_and_full(tmp_path, base, batches):
+    # Store construit par ajouts successifs et store ingéré en une fois avec les mêmes articles
+    json_path = write_corpus(str(tmp_path / 'corpus.json'), base)
+    store_path = str(tmp_path / 'store')
+    corpus_store.ingest(json_path, store_path)
+    for k, batch in enumerate(batches):
+        corpus_store.append(json_path, [write_batch(str(tmp_path / f'batch{k}.jsonl'), batch)], store_path)
+    full_path = write_corpus(str(tmp_path / 'full.json'), base + [a for batch in batches for a in batch])
+    corpus_store.ingest(full_path, str(tmp_path / 'full'))
+    return corpus_store.CorpusStore(store_path), corpus_store.CorpusStore(str(tmp_path / 'full'))
+
+
+# Corpus de base : du 6 janvier au 20 mars 2025, un jour sur cinq sans article (dont le 30 janvier)
+BASE = (date(2025, 1, 6), date(2025, 3, 20))
+
+
+def late(articles):
+    # Articles publiés en fin de journée : postérieurs à tous ceux déjà stockés pour ce jour
+    return [(day, dict(article, timestamp=int(article['timestamp']) // 86400 * 86400 + 86399 - k))
+            for k, (day, article) in enumerate(articles)]
+
+
+def test_append_tail(tmp_path, factory, monkeypatch):
+    # Dernier jour du store complété (jour scindé entre le store et le lot), puis jours suivants : colonnes prolongées
+    monkeypatch.setattr(corpus_store.StoreBuilder, '_merge', None)
+    base = factory.days(*BASE)
+    batch = late(factory.day(BASE[1], 2)) + factory.days(date(2025, 3, 21), date(2025, 4, 10), 2)
+    store, expected = appended_and_full(tmp_path, base, [batch])
+    assert_same_store(store, expected)
+
+
+def test_append_mid_range(tmp_path, factory):
+    # Articles de jours existants et d'un jour vide au milieu du store : colonnes par article réécrites
+    base = factory.days(*BASE)
+    batch = factory.day(date(2025, 1, 30), 2) + factory.day(date(2025, 2, 12), 1) + factory.day(date(2025, 1, 6), 1)
+    store, expected = appended_and_full(tmp_path, base, [batch])
+    assert_same_store(store, expected)
+
+
+def test_append_empty_batch(tmp_path, factory):
+    base = factory.days(*BASE)
+    store, expected = appended_and_full(tmp_path, base, [[]])
+    assert_same_store(store, expected)
+    assert store.manifest['version'] == 1
+
+
+def test_append_sequence(tmp_path, factory):
+    # Lots successifs sur le même store : fin, milieu, mois sautés, lot vide
+    base = factory.days(*BASE)
+    batches = [late(factory.day(BASE[1], 1)) + factory.day(date(2025, 3, 24), 2),
+               factory.day(date(2025, 2, 4), 2),
+               factory.day(date(2025, 7, 2), 3),
+               []]
+    store, expected = appended_and_full(tmp_path, base, batches)
+    assert_same_store(store, expected)
+
+
+def test_append_after_empty_months(tmp_path, factory):
+    base = factory.days(date(2025, 1, 6), date(2025, 5, 20))
+    store, expected = appended_and_full(tmp_path, base, [factory.day(date(2025, 8, 20), 3), factory.day(date(2025, 8, 21), 2)])
+    assert_same_store(store, expected)
+    assert len(os.listdir(str(tmp_path / 'store.batches'))) == 2
+
+
+def test_failed_append_keeps_no_batch(tmp_path, factory, monkeypatch):
+    json_path = write_corpus(str(tmp_path / 'corpus.json'), factory.days(date(2025, 1, 6), date(2025, 1, 20)))
+    store_path = str(tmp_path / 'store')
+    corpus_store.ingest(json_path, store_path)
+    n_articles = corpus_store.CorpusStore(store_path).n_articles
+
+    def fail(*args):
+        raise OSError("disque plein")
+    monkeypatch.setattr(corpus_store.StoreBuilder, 'extend', fail)
+    batch = write_batch(str(tmp_path / 'batch.jsonl'), factory.day(date(2025, 1, 21), 2))
+    with pytest.raises(OSError):
+        corpus_store.append(json_path, [batch], store_path)
+    assert corpus_store._stored_batches(store_path) == []
+    assert corpus_store.CorpusStore(store_path).n_articles == n_articles
@@ -0,0 +1,29 @@
+from datetime import date
+
+import corpus_store
+from bursts import burst_days
+from conftest import write_batch, write_corpus
+from corpus_registry import CorpusRegistry
+
+
+def test_burst_days_cover_months_and_baseline():
+    assert burst_days(date(2025, 3, 12), date(2025, 5, 3)) == (date(2024, 9, 1), date(2025, 5, 31))
+    assert burst_days(date(2025, 6, 30), date(2025, 12, 1)) == (date(2024, 12, 1), date(2025, 12, 31))
+    assert burst_days() == (None, None)
+
+
+def test_peaks_stamp_sees_baseline_appends(tmp_path, factory, monkeypatch):
+    monkeypatch.setattr(corpus_store, 'STORE_DIR', str(tmp_path / 'store'))
+    json_path = write_corpus(str(tmp_path / 'fr.sputniknews.africa-bursts-test.json'),
+                             factory.days(date(2025, 1, 6), date(2025, 1, 25)) + factory.days(date(2025, 5, 6), date(2025, 5, 20)))
+    registry = CorpusRegistry(data_dir=str(tmp_path), reload_interval=0)
+    names = ['Test/Bursts']
+    store = registry.get(names[0])
+    start, end = date(2025, 5, 10), date(2025, 5, 20)
+    before = (registry.data_version(names, start, end), registry.data_version(names, *burst_days(start, end)))
+    # Ajout dans le mois de référence de janvier et au début de mai, hors de l'intervalle affiché
+    batch = factory.day(date(2025, 1, 28), 3) + factory.day(date(2025, 5, 2), 2)
+    corpus_store.append(json_path, [write_batch(str(tmp_path / 'batch.jsonl'), batch)], store.store_path)
+    after = (registry.data_version(names, start, end), registry.data_version(names, *burst_days(start, end)))
+    assert after[0] == before[0]
+    assert after[1] != before[1]
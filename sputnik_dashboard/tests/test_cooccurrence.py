@@ -0,0 +1,66 @@
+import os
+import json
+from datetime import date
+
+import numpy as np
+
+import corpus_store
+from conftest import write_batch, write_corpus
+from cooccurrence import COOC_PAIRS, _starts, pair_triplets
+from corpus_registry import CorpusRegistry
+
+
+def test_starts_of_empty_lengths():
+    assert len(_starts(np.zeros(0, dtype=np.int64))) == 0
+    assert _starts(np.array([2, 0, 3])).tolist() == [0, 2, 2]
+
+
+def test_pair_triplets_without_segments():
+    empty = (np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+    no_paragraphs = (np.zeros(3, dtype=np.int64), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+    for segments, article_day in ((empty, np.zeros(0)), (no_paragraphs, np.zeros(2))):
+        for symmetric in (False, True):
+            assert all(len(x) == 0 for x in pair_triplets(segments, segments, article_day, symmetric))
+
+
+def test_empty_corpus_is_loaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_store, 'STORE_DIR', str(tmp_path / 'store'))
+    with open(tmp_path / 'fr.sputniknews.africa-vide-test.json', 'w', encoding='utf-8') as f:
+        json.dump({'metadata': {}, 'data': {}}, f)
+    registry = CorpusRegistry(data_dir=str(tmp_path))
+    store = registry.get('Test/Vide')
+    assert store is not None and not registry.failed
+    assert store.n_articles == 0 and len(store.counts('kws')) == 0
+
+
+def test_batch_without_paragraph_lists(tmp_path, factory):
+    json_path = write_corpus(str(tmp_path / 'corpus.json'), factory.days(date(2025, 1, 6), date(2025, 1, 20)))
+    store_path = str(tmp_path / 'store')
+    corpus_store.ingest(json_path, store_path)
+    before = corpus_store.CorpusStore(store_path)
+    batch = [(day, {k: v for k, v in article.items() if not k.endswith('-l')})
+             for day, article in factory.day(date(2025, 1, 21), 4)]
+    assert corpus_store.append(json_path, [write_batch(str(tmp_path / 'batch.jsonl'), batch)], store_path) == 4
+    after = corpus_store.CorpusStore(store_path)
+    assert after.n_articles == before.n_articles + 4 and after.n_segments == before.n_segments
+    for a_ent, b_ent in COOC_PAIRS:
+        assert after.cooccurrence(a_ent, b_ent).matrix().nnz == before.cooccurrence(a_ent, b_ent).matrix().nnz
+    term = next(iter(batch[0][1]['kws']))
+    assert after.as_dict('kws', date(2025, 1, 21), date(2025, 1, 21))[term] == sum(a['kws'].get(term, 0) for _, a in batch)
+    assert os.path.islink(store_path)
+
+
+def test_row_matches_range_matrix(tmp_path, factory):
+    json_path = write_corpus(str(tmp_path / 'corpus.json'), factory.days(date(2025, 1, 6), date(2025, 2, 20)))
+    corpus_store.ingest(json_path, str(tmp_path / 'store'))
+    store = corpus_store.CorpusStore(str(tmp_path / 'store'))
+    n_days = len(store.days)
+    for a_ent, b_ent in COOC_PAIRS:
+        index = store.cooccurrence(a_ent, b_ent)
+        for lo, hi in ((0, n_days), (0, 7), (5, 20), (n_days - 3, n_days)):
+            matrix = index.matrix(lo, hi).tocsr()
+            for i in range(0, matrix.shape[0], 7):
+                cols, counts = index.row(i, lo, hi)
+                line = matrix.getrow(i)
+                expected = {int(j): int(c) for j, c in zip(line.indices, line.data) if c}
+                assert dict(zip(cols.tolist(), counts.tolist())) == expected, (a_ent, b_ent, lo, hi, i)
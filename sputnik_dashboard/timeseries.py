@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+FREQUENCIES = ('D', 'W', 'M')
+
+
+def ordinals_to_datetime64(ordinals):
+    return (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+def period_start(days, freq):
+    # Début de la période (jour, lundi de la semaine, 1er du mois) pour chaque date datetime64[D]
+    if freq == 'W':
+        # 1970-01-01 est un jeudi : +3 ramène les lundis à 0
+        return days - ((days.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    if freq == 'M':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    return days
+
+
+class DailySeries:
+    # Série quotidienne du nombre d'articles d'un corpus (jours publiés uniquement, triés)
+    def __init__(self, ordinals, counts):
+        self.days = ordinals_to_datetime64(ordinals)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.cumsum = np.concatenate(([0], np.cumsum(self.counts)))
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.days, store.day_num)
+
+    @property
+    def first_day(self):
+        return self.days[0].astype(date) if len(self.days) else None
+
+    @property
+    def last_day(self):
+        return self.days[-1].astype(date) if len(self.days) else None
+
+    def _bounds(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self.days, np.datetime64(start, 'D'), 'left'))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, np.datetime64(end, 'D'), 'right'))
+        return lo, hi
+
+    def total(self, start=None, end=None):
+        lo, hi = self._bounds(start, end)
+        return int(self.cumsum[hi] - self.cumsum[lo])
+
+    def span(self, start=None, end=None):
+        # Premier et dernier jour publiés dans l'intervalle
+        lo, hi = self._bounds(start, end)
+        if hi <= lo:
+            return None, None
+        return self.days[lo].astype(date), self.days[hi - 1].astype(date)
+
+    def resample(self, freq='M', start=None, end=None):
+        # Regroupement vectorisé par jour / semaine / mois, périodes vides comprises (à 0)
+        lo, hi = self._bounds(start, end)
+        days, counts = self.days[lo:hi], self.counts[lo:hi]
+        if not len(days):
+            return np.zeros(0, dtype='datetime64[D]'), np.zeros(0, dtype=np.int64)
+        bins = period_start(days, freq)
+        if freq == 'M':
+            months = bins.astype('datetime64[M]')
+            index = np.arange(months[0], months[-1] + 1)
+            values = np.bincount((months - months[0]).astype(np.int64), weights=counts, minlength=len(index))
+            return index.astype('datetime64[D]'), values.astype(np.int64)
+        step = 7 if freq == 'W' else 1
+        offsets = (bins - bins[0]).astype(np.int64) // step
+        index = bins[0] + np.arange(offsets[-1] + 1) * np.timedelta64(step, 'D')
+        return index, np.bincount(offsets, weights=counts, minlength=len(index)).astype(np.int64)
+
+
+def period_range(period, last_day):
+    # Filtres prédéfinis -> (début, fin) inclusifs, None = non borné
+    if period in ('2024', '2025'):
+        return date(int(period), 1, 1), date(int(period), 12, 31)
+    if period == 'last6' and last_day is not None:
+        return last_day - timedelta(days=180), last_day
+    return None, None
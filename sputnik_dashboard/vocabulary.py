@@ -0,0 +1,31 @@
+import numpy as np
+
+
+def top_n(counts, n):
+    # Sélection partielle : ids des n plus grands comptes non nuls, triés (compte décroissant, id croissant)
+    n = min(n, int(np.count_nonzero(counts)))
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    ids = np.argpartition(-counts, n - 1)[:n]
+    return ids[np.lexsort((ids, -counts[ids]))]
+
+
+class Vocabulary:
+    # Interning terme -> id entier, partagé par tous les corpus pour un type d'entité
+    def __init__(self):
+        self.terms = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def intern(self, terms):
+        ids = self.ids
+        out = np.empty(len(terms), dtype=np.int64)
+        for i, term in enumerate(terms):
+            j = ids.get(term)
+            if j is None:
+                j = ids[term] = len(self.terms)
+                self.terms.append(term)
+            out[i] = j
+        return out
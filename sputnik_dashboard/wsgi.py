@@ -0,0 +1,32 @@
+import gc
+import logging
+
+from bursts import BURST_ENTITIES
+from corpus_store import ENTITY_TYPES
+import dashboard_app
+
+logger = logging.getLogger(__name__)
+
+
+def preload(registry):
+    # Ingestion et ouverture de tous les corpus, puis structures dérivées construites une seule fois :
+    # les colonnes sont des mmap en lecture seule (pages partagées par le cache disque), le reste est
+    # hérité en copie-sur-écriture par les workers forkés
+    for name, store in registry.stores():
+        store.series
+        store.search_terms
+        logger.info("Corpus %s préchargé (%d articles)", name, store.n_articles)
+    for ent in ENTITY_TYPES:
+        registry.counts(None, ent)
+    # Pics d'attention de la vue combinée (détection sur les comptes mensuels fusionnés)
+    for ent in BURST_ENTITIES:
+        registry.bursts(None, ent)
+
+
+def create_app(preload_data=True):
+    # Fabrique WSGI : gunicorn "wsgi:create_app()" -c gunicorn.conf.py
+    if preload_data:
+        preload(dashboard_app.registry)
+    # Objets du processus maître exclus du ramasse-miettes : leurs pages ne sont pas recopiées après le fork
+    gc.freeze()
+    return dashboard_app.server